@@ -1,10 +1,35 @@
-from crewai import Agent, Task, Crew
+import queue
+from contextlib import contextmanager
+from typing import Any, Optional
+from crewai import Agent, BaseLLM, Task, Crew
 from ..core.config import settings
+from ..services.categorizer import CATEGORIES, run_pipeline, openai_complete
 from ..services.llm import get_openai
+from ..services.reports_ai import summarize_month
 
 # Minimal CrewAI setup for POC: categorization + reporting orchestration
+# CREW_MODE=direct skips CrewAI for these single-agent tasks and calls OpenAI directly.
+
+
+class CachedChatLLM(BaseLLM):
+    """CrewAI LLM calling the OpenAI client from `get_openai`, so agent completions go through `llm_cache` too."""
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None) -> Any:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        params = {"model": self.model, "messages": messages}
+        if self.temperature is not None:
+            params["temperature"] = self.temperature
+        if self.stop:
+            params["stop"] = self.stop
+        return get_openai().chat.completions.create(**params).choices[0].message.content
+
+    def supports_function_calling(self) -> bool:
+        return False
+
 
 def make_agents():
+    llm = CachedChatLLM(model="gpt-4o-mini")
     tx_agent = Agent(
         role="Gestionnaire de transactions",
         goal="Catégoriser et enrichir les écritures comptables",
@@ -13,8 +38,7 @@ def make_agents():
         ),
         verbose=False,
         allow_delegation=False,
-        llm="gpt-4o-mini",
-        api_key=settings.OPENAI_API_KEY,
+        llm=llm,
     )
 
     report_agent = Agent(
@@ -23,8 +47,7 @@ def make_agents():
         backstory="10 ans d'expérience en reporting et pilotage de la performance",
         verbose=False,
         allow_delegation=False,
-        llm="gpt-4o-mini",
-        api_key=settings.OPENAI_API_KEY,
+        llm=llm,
     )
 
     orchestrator = Agent(
@@ -33,44 +56,69 @@ def make_agents():
         backstory="Chef de mission qui sait qui fait quoi et dans quel ordre",
         verbose=False,
         allow_delegation=True,
-        llm="gpt-4o-mini",
-        api_key=settings.OPENAI_API_KEY,
+        llm=llm,
     )
 
     return orchestrator, tx_agent, report_agent
 
 
-def categorize_with_crew(rows: list[dict]) -> list[str]:
-    orchestrator, tx_agent, _ = make_agents()
+class AgentPool:
+    """Agent sets built once per process and reused across requests.
 
-    description = (
-        "Attribue une catégorie à chaque transaction. Réponds avec une catégorie par ligne, "
-        "dans le même ordre que l'entrée. Catégories métiers usuelles (FR)."
-    )
-    content = "\n".join(
-        f"{r['id']} | {r['date']} | {r['amount']} | {r['direction']} | {r.get('description','')}"
-        for r in rows
-    )
+    A set is lent to one thread at a time, so concurrent requests never share
+    an Agent; the pool grows to the peak concurrency and then stops building.
+    """
+
+    def __init__(self) -> None:
+        self._free: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
 
-    t = Task(description=description + "\n\n" + content, agent=tx_agent, expected_output="liste de catégories")
-    crew = Crew(agents=[orchestrator, tx_agent], tasks=[t])
-    result = crew.kickoff()
-    lines = [ln.strip() for ln in str(result).splitlines() if ln.strip()]
-    while len(lines) < len(rows):
-        lines.append("Autres")
-    return lines[: len(rows)]
+    @contextmanager
+    def acquire(self):
+        try:
+            agents = self._free.get_nowait()
+        except queue.Empty:
+            agents = make_agents()
+        try:
+            yield agents
+        finally:
+            self._free.put(agents)
+
+
+agent_pool = AgentPool()
+
+
+def categorize_with_crew(rows: list[dict]) -> list[Optional[str]]:
+    """Categories aligned with `rows`, through the shared chunked pipeline; None where the LLM gave no answer."""
+
+    def complete(chunk: list[dict]) -> str:
+        description = (
+            "Attribue une catégorie à chaque transaction. Réponds avec une ligne `id|catégorie` "
+            "par transaction, en reprenant l'id de l'entrée. Catégories: " + ", ".join(CATEGORIES)
+        )
+        content = "\n".join(
+            f"{r['id']} | {r['date']} | {r['amount']} | {r['direction']} | {r.get('description','')}"
+            for r in chunk
+        )
+        with agent_pool.acquire() as (_, tx_agent, _report):
+            t = Task(description=description + "\n\n" + content, agent=tx_agent, expected_output="lignes id|catégorie")
+            # Single task: no orchestrator to delegate to
+            return str(Crew(agents=[tx_agent], tasks=[t]).kickoff())
+
+    cats = run_pipeline(rows, openai_complete if settings.CREW_MODE == "direct" else complete)
+    return [cats.get(r["id"]) for r in rows]
 
 
 def summarize_with_crew(payload: dict) -> str:
-    orchestrator, _, report_agent = make_agents()
-    t = Task(
-        description=(
-            "Rédige un résumé (<100 mots) des indicateurs du mois et propose 2 actions. "
-            f"Données: {payload}"
-        ),
-        agent=report_agent,
-        expected_output="texte concis en français",
-    )
-    crew = Crew(agents=[orchestrator, report_agent], tasks=[t])
-    result = crew.kickoff()
+    if settings.CREW_MODE == "direct":
+        return summarize_month(payload["income"], payload["expense"], payload["net"], payload["year"], payload["month"])
+    with agent_pool.acquire() as (_, _tx, report_agent):
+        t = Task(
+            description=(
+                "Rédige un résumé (<100 mots) des indicateurs du mois et propose 2 actions. "
+                f"Données: {payload}"
+            ),
+            agent=report_agent,
+            expected_output="texte concis en français",
+        )
+        result = Crew(agents=[report_agent], tasks=[t]).kickoff()
     return str(result).strip()
@@ -17,6 +17,80 @@ class Settings(BaseSettings):
     JWT_SECRET: str = "change_me_dev_secret"
     JWT_ALGO: str = "HS256"
     CASH_MIN_THRESHOLD: float = 1000.0
+    # Max age of the in-memory FX index before it is reloaded (other workers' writes)
+    FX_INDEX_TTL_SECONDS: float = 300.0
+    # Batched forecasts fan out to a process pool from this many series (0 workers = all CPUs)
+    FORECAST_POOL_MIN_SERIES: int = 2000
+    FORECAST_POOL_WORKERS: int = 0
+    # Reconciliation: +/- days around a bank line date, rapidfuzz workers (-1 = all cores)
+    RECON_DATE_WINDOW_DAYS: int = 2
+    RECON_WORKERS: int = -1
+    RECON_CHUNK_ROWS: int = 5000  # statement lines parsed/matched/inserted per batch
+    IMPORT_BATCH_ROWS: int = 5000  # CSV import rows per INSERT/commit
+    # Local categorizer: used once trained on this many labels, for predictions at least this confident
+    LOCAL_CATEGORIZER_MIN_TRAINING_ROWS: int = 200
+    LOCAL_CATEGORIZER_MIN_CONFIDENCE: float = 0.7
+    # Uploaded documents: content-addressed blob directory, bytes read/hashed/written per chunk
+    DOCS_DIR: str = "storage/docs"
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    # Invoice OCR jobs: jobs in flight (threads waiting on the LLM), PDF text extraction processes (0 = all CPUs)
+    OCR_JOB_WORKERS: int = 4
+    OCR_PROCESS_WORKERS: int = 0
+    OCR_JOB_STALE_MINUTES: float = 30  # running this long at startup: the process died, run it again
+    # LLM calls: parallel requests, retries (exponential backoff from the base delay), prompt size
+    LLM_CONCURRENCY: int = 4
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_SECONDS: float = 1.0
+    CATEGORIZE_CHUNK_TOKENS: int = 2000
+    # Persistent cache of chat completions (narratives, invoice parsing, categories)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = "storage/llm_cache.db"
+    LLM_CACHE_TTL_SECONDS: float = 30 * 24 * 3600
+    LLM_CACHE_MAX_MB: float = 256
+    # "crew" runs agents through CrewAI, "direct" calls OpenAI straight for single-agent tasks
+    CREW_MODE: str = "crew"
+    # Background threads generating monthly report narratives
+    NARRATIVE_WORKERS: int = 2
+    # Budget consumption is updated incrementally; recomputed in full this often (re-categorized rows, new rates)
+    BUDGET_FULL_RECOMPUTE_HOURS: float = 24
+    # Ids skipped by the incremental pass (not committed yet) are looked for again this long
+    BUDGET_GAP_WAIT_MINUTES: float = 15
+    # Resolved alerts older than this (by last occurrence) are moved to the archive table
+    ALERT_RETENTION_DAYS: int = 90
+    # List endpoints: rows per page when `limit` is omitted, and the server-side cap
+    PAGE_DEFAULT_LIMIT: int = 100
+    PAGE_MAX_LIMIT: int = 500
+    # /search ranks (BM25) at most this many of the newest matches per entity type
+    SEARCH_RANK_WINDOW: int = 2000
+    # Serve the hot read endpoints (transactions, reports, search, notifications) from async routes
+    ASYNC_DB: bool = False
+    # SQLite profile, applied on every new connection (empty journal mode = keep the file's);
+    # WAL lets reads proceed during a write, NORMAL sync is durable in WAL except on power loss
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE_MB: int = 256
+    SQLITE_BUSY_TIMEOUT_MS: int = 15000
+    # Connections per engine (SQLite and Postgres); size + overflow must cover the 40 threadpool
+    # workers plus background jobs, or requests queue on the pool while holding a worker
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 40
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    # HTTP requests handled at once (0 = unbounded); the others wait without holding a thread or a
+    # connection. Keep it below pool size + overflow: a sync route holds its connection until its
+    # response is validated on a second threadpool worker. With ASYNC_DB the async read routes are not counted
+    MAX_CONCURRENT_REQUESTS: int = 40
+    # Users resolved from bearer tokens are cached this long (0 = off), up to this many tokens
+    AUTH_CACHE_TTL_SECONDS: float = 30
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    # Threads hashing/verifying passwords (pbkdf2 is CPU-bound): caps the cores logins can take
+    PASSWORD_HASH_WORKERS: int = 2
+    # Startup: create/repair the demo users (also `python -m app.seed`); run the background
+    # jobs in this process (with several workers, leave it on for one of them only)
+    SEED_DEMO_USERS: bool = False
+    SCHEDULER_ENABLED: bool = True
+    # Read-only engine for GET routes: a replica URL, or the same SQLite file (query_only connections)
+    DATABASE_READ_URL: str | None = None
 
     def allow_origins(self) -> List[str]:
         v = (self.ALLOW_ORIGINS_RAW or "").strip()
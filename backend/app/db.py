@@ -1,17 +1,128 @@
+from typing import Dict, List, Optional
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from .core.config import settings
 
-# Ensure SQLite works across threads for FastAPI
-connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(settings.DATABASE_URL, echo=False, connect_args=connect_args)
+# Session.info key marking sessions on the read-only engine (writes must go to `engine`)
+READ_ONLY = "read_only"
+
+
+def _sqlite_pragmas(read_only: bool) -> List[str]:
+    pragmas = [f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}"]
+    if settings.SQLITE_JOURNAL_MODE:
+        pragmas.append(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+    pragmas += [
+        f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size = -{int(settings.SQLITE_CACHE_SIZE_KB)}",  # negative: KiB, not pages
+        f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE_MB) * 1024 * 1024}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    return pragmas
+
+
+def _engine_options(url: str, read_only: bool = False) -> Dict:
+    """create_engine keyword arguments for the configured profile."""
+    if url.startswith("sqlite"):
+        # Ensure SQLite works across threads for FastAPI; the busy timeout is set by pragma
+        options: Dict = {"connect_args": {"check_same_thread": False}}
+        if ":memory:" in url or url.rstrip("/").endswith(":"):
+            return options  # in-memory databases live on a single pooled connection
+    else:
+        options = {"pool_pre_ping": True, "connect_args": {}}
+        if read_only:
+            options["connect_args"]["options"] = "-c default_transaction_read_only=on"
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    )
+    return options
+
+
+def _apply_profile(sync_engine: Engine, read_only: bool = False) -> None:
+    if sync_engine.dialect.name != "sqlite":
+        return
+    pragmas = _sqlite_pragmas(read_only)
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def create_db_engine(url: str, read_only: bool = False) -> Engine:
+    new_engine = create_engine(url, echo=False, **_engine_options(url, read_only))
+    _apply_profile(new_engine, read_only)
+    return new_engine
+
+
+engine = create_db_engine(settings.DATABASE_URL)
+# GET routes read through this one; the primary engine when no DATABASE_READ_URL is set
+read_engine = create_db_engine(settings.DATABASE_READ_URL, read_only=True) if settings.DATABASE_READ_URL else engine
+
+_async_engine: Optional[AsyncEngine] = None
+
+
+def async_database_url(url: str) -> str:
+    """Async driver for DATABASE_URL: aiosqlite for SQLite, psycopg (v3) for Postgres."""
+    scheme, sep, rest = url.partition("://")
+    backend = scheme.split("+", 1)[0]
+    if backend == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if backend in ("postgresql", "postgres"):
+        return f"postgresql+psycopg{sep}{rest}"
+    raise ValueError(f"pas de driver async pour {scheme}")
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        options = _engine_options(settings.DATABASE_URL)
+        if "pool_size" in options:
+            options["poolclass"] = AsyncAdaptedQueuePool  # aiosqlite defaults to NullPool on files
+        _async_engine = create_async_engine(async_database_url(settings.DATABASE_URL), echo=False, **options)
+        _apply_profile(_async_engine.sync_engine)
+    return _async_engine
 
 
 def init_db() -> None:
     # Import models so SQLModel can discover them
     from . import models  # noqa: F401
+    from .migrations import run_migrations
     SQLModel.metadata.create_all(engine)
+    # Bring tables that predate the current models up to date (see app/migrations.py)
+    run_migrations(engine)
+
+
+def get_session(request: Request):
+    """Request session: on `read_engine` for GET/HEAD requests, on the primary engine otherwise.
+
+    With a replica as DATABASE_READ_URL, a GET right after a write may not see
+    it yet. Code that writes from a GET (report snapshots) checks
+    `session.info[READ_ONLY]` and writes through `engine` instead.
+    """
+    if read_engine is not engine and request.method in ("GET", "HEAD"):
+        with Session(read_engine, info={READ_ONLY: True}) as session:
+            yield session
+    else:
+        with Session(engine) as session:
+            yield session
+
 
+async def get_async_session():
+    """AsyncSession on the async engine (ASYNC_DB=true routes).
 
-def get_session():
-    with Session(engine) as session:
+    Service code is written against the sync Session; async routes call it
+    through `await session.run_sync(fn, ...)`, which hands `fn` a regular
+    Session whose I/O is awaited instead of holding a threadpool worker.
+    """
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
         yield session
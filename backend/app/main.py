@@ -1,12 +1,43 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import os
 from .db import init_db
 from .core.config import settings
-from .routers import transactions, budgets, reports, analysis, reconciliation, documents, notifications, treasury, auth, invoices, fx, users, search
+from .services.pagination import NEXT_CURSOR_HEADER
+from .routers import transactions, budgets, reports, analysis, reconciliation, documents, notifications, treasury, auth, invoices, fx, users, search, async_reads
 
 app = FastAPI(title="Financial Assistant AI (POC)")
 
+
+class ConcurrencyLimit:
+    """ASGI middleware admitting at most `limit` HTTP requests at a time.
+
+    GET/HEAD requests to `exempt` paths (the async read routes, which wait on
+    the event loop rather than on a threadpool worker) are not counted.
+    """
+
+    def __init__(self, app, limit: int, exempt: frozenset = frozenset()) -> None:
+        self.app = app
+        self.slots = asyncio.Semaphore(limit)
+        self.exempt = exempt
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (
+            scope["method"] in ("GET", "HEAD") and scope["path"].rstrip("/") in self.exempt
+        ):
+            return await self.app(scope, receive, send)
+        async with self.slots:
+            await self.app(scope, receive, send)
+
+
+if settings.MAX_CONCURRENT_REQUESTS > 0:
+    app.add_middleware(
+        ConcurrencyLimit,
+        limit=settings.MAX_CONCURRENT_REQUESTS,
+        exempt=frozenset(r.path.rstrip("/") for r in async_reads.routes) if settings.ASYNC_DB else frozenset(),
+    )
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -14,9 +45,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Routers
+if settings.ASYNC_DB:
+    # Registered first so they shadow the sync versions of the same paths
+    app.include_router(async_reads)
 app.include_router(transactions)
 app.include_router(budgets)
 app.include_router(reports)
@@ -35,38 +70,33 @@ app.include_router(search)
 @app.on_event("startup")
 def on_startup():
     # Ensure storage dirs
-    os.makedirs(os.path.join("storage", "docs"), exist_ok=True)
+    os.makedirs(settings.DOCS_DIR, exist_ok=True)
     init_db()
-    # Seed demo users if missing
-    from .services.security import hash_password
-    from .models import User
     from sqlmodel import Session
     from .db import engine
     with Session(engine) as s:
-        from sqlmodel import select
-        from .services.security import verify_password
-        def ensure(email, pwd, role):
-            u = s.exec(select(User).where(User.email==email)).first()
-            if not u:
-                u = User(email=email, hashed_password=hash_password(pwd), role=role, is_active=True)
-                s.add(u)
-                s.commit()
-            else:
-                # Ensure role is correct
-                if u.role != role:
-                    u.role = role
-                # Ensure password hash is valid for the expected password (handles bcrypt->pbkdf2 migrations)
-                if not verify_password(pwd, u.hashed_password):
-                    u.hashed_password = hash_password(pwd)
-                s.add(u)
-                s.commit()
-        ensure("admin@example.com", "Passw0rd!", "admin")
-        ensure("finance@example.com", "Passw0rd!", "finance_manager")
-        ensure("accountant@example.com", "Passw0rd!", "accountant")
-        ensure("user@example.com", "Passw0rd!", "user")
+        if settings.SEED_DEMO_USERS:
+            from .seed import seed_demo_users
+            seed_demo_users(s)
+        from .services.rollup import ensure_rollups
+        ensure_rollups(s)
+    from .services.search_index import ensure_search_index
+    ensure_search_index(engine)
+    from .services.jobs import resume_jobs
+    resume_jobs()
     # Start background jobs (notifications)
-    from .services.scheduler import start_scheduler
-    start_scheduler()
+    if settings.SCHEDULER_ENABLED:
+        from .services.scheduler import start_scheduler
+        start_scheduler()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    from .services.jobs import shutdown_jobs
+    shutdown_jobs()
+    if settings.ASYNC_DB:
+        from .db import get_async_engine
+        await get_async_engine().dispose()
 
 
 @app.get("/")
@@ -0,0 +1,164 @@
+"""Versioned schema migrations.
+
+`SQLModel.metadata.create_all` creates missing tables (with the indexes
+declared on the models) but never touches existing ones. The migrations below
+bring existing databases to the same schema; each runs once, in its own
+transaction, and is recorded in `schema_migrations`. They are written to be
+no-ops on a database that create_all has just built, so a fresh install runs
+them all harmlessly.
+
+Add a migration by appending to MIGRATIONS with the next version number;
+never edit one that has shipped. Apply with `python -m app.migrations`
+(also done at startup by `init_db`).
+"""
+import logging
+from datetime import datetime
+from typing import Callable, List, Tuple
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+
+def _columns(conn: Connection, table: str) -> set:
+    return {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> bool:
+    if column in _columns(conn, table):
+        return False
+    conn.exec_driver_sql(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {ddl}')
+    return True
+
+
+def _index(conn: Connection, name: str, table: str, columns: str, unique: bool = False, where: str = "") -> None:
+    conn.exec_driver_sql(
+        f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS {name} ON "{table}" ({columns})'
+        + (f" WHERE {where}" if where else "")
+    )
+
+
+def m001_alert_fingerprint(conn: Connection) -> None:
+    """Alert deduplication columns (fingerprint, occurrences, last_seen_at)."""
+    _add_column(conn, "alert", "fingerprint", "VARCHAR")
+    if _add_column(conn, "alert", "occurrences", "INTEGER DEFAULT 1"):
+        conn.exec_driver_sql("UPDATE alert SET occurrences = 1")
+    if _add_column(conn, "alert", "last_seen_at", "TIMESTAMP"):
+        conn.exec_driver_sql("UPDATE alert SET last_seen_at = created_at")
+    _index(conn, "ix_alert_resolved_last_seen", "alert", "resolved, last_seen_at, id")
+    _index(conn, "ix_alert_fingerprint_resolved", "alert", "fingerprint, resolved, id")
+
+
+def m002_hot_path_indexes(conn: Connection) -> None:
+    """Indexes behind list pagination, date-range scans and lookups by foreign key."""
+    _index(conn, "ix_transaction_date_id", "transaction", "date, id")
+    _index(conn, "ix_transaction_category_date", "transaction", "category, date")
+    _index(conn, "ix_transaction_account_date", "transaction", "account_id, date")
+    _index(conn, "ix_invoice_created_id", "invoice", "created_at, id")
+    _index(conn, "ix_reconciliationmatch_transaction", "reconciliationmatch", "transaction_id")
+    _index(conn, "ix_monthlyrollup_month", "monthlyrollup", "month")
+    _index(conn, "ix_report_type_period", "report", "type, period_start, period_end")
+
+
+def m003_unique_fx_rate_per_day(conn: Connection) -> None:
+    """One exchange rate per (currency, date): keep the latest row of each duplicate group."""
+    conn.exec_driver_sql(
+        "DELETE FROM exchangerate WHERE id NOT IN "
+        "(SELECT MAX(id) FROM exchangerate GROUP BY currency, date)"
+    )
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_exchangerate_currency_date")
+    _index(conn, "ux_exchangerate_currency_date", "exchangerate", "currency, date", unique=True)
+
+
+def m004_unique_user_email(conn: Connection) -> None:
+    """Unique user emails. Duplicates are reported, not merged: resolve them by hand."""
+    dupes = conn.exec_driver_sql(
+        'SELECT email, COUNT(*) FROM "user" GROUP BY email HAVING COUNT(*) > 1'
+    ).all()
+    if dupes:
+        raise RuntimeError(f"duplicate user emails, fix before migrating: {', '.join(e for e, _ in dupes)}")
+    _index(conn, "ux_user_email", "user", "email", unique=True)
+
+
+def m005_document_blobs(conn: Connection) -> None:
+    """Content-addressed documents: hash, size and reference count. Older files keep a NULL hash."""
+    _add_column(conn, "document", "sha256", "VARCHAR")
+    _add_column(conn, "document", "size_bytes", "INTEGER")
+    if _add_column(conn, "document", "ref_count", "INTEGER DEFAULT 1"):
+        conn.exec_driver_sql("UPDATE document SET ref_count = 1")
+    _index(conn, "ux_document_sha256", "document", "sha256", unique=True)
+
+
+def m006_exchange_rate_updated_at(conn: Connection) -> None:
+    """Last change of each exchange rate, so report snapshots can tell an in-place rate update."""
+    if _add_column(conn, "exchangerate", "updated_at", "TIMESTAMP"):
+        conn.execute(text("UPDATE exchangerate SET updated_at = :t"), {"t": datetime.utcnow()})
+    _index(conn, "ix_exchangerate_updated_at", "exchangerate", "updated_at")
+
+
+def m007_unique_open_alert(conn: Connection) -> None:
+    """One open alert per fingerprint: older open duplicates are resolved, the latest one stays open."""
+    conn.execute(
+        text(
+            "UPDATE alert SET resolved = :t WHERE NOT resolved AND fingerprint IS NOT NULL AND id NOT IN "
+            "(SELECT MAX(id) FROM alert WHERE NOT resolved AND fingerprint IS NOT NULL GROUP BY fingerprint)"
+        ),
+        {"t": True},
+    )
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_alert_fingerprint_resolved")
+    # Same predicate as the model's index: SQLite only matches the upsert's conflict target to it literally
+    where = "resolved = 0" if conn.dialect.name == "sqlite" else "NOT resolved"
+    _index(conn, "ux_alert_open_fingerprint", "alert", "fingerprint", unique=True, where=where)
+
+
+def m008_scheduler_pending_gaps(conn: Connection) -> None:
+    """Transaction ids the budget watermark passed before they were committed."""
+    if _add_column(conn, "schedulerstate", "pending_gaps", "VARCHAR DEFAULT '[]'"):
+        conn.exec_driver_sql("UPDATE schedulerstate SET pending_gaps = '[]'")
+
+
+MIGRATIONS: List[Tuple[int, Callable[[Connection], None]]] = [
+    (1, m001_alert_fingerprint),
+    (2, m002_hot_path_indexes),
+    (3, m003_unique_fx_rate_per_day),
+    (4, m004_unique_user_email),
+    (5, m005_document_blobs),
+    (6, m006_exchange_rate_updated_at),
+    (7, m007_unique_open_alert),
+    (8, m008_scheduler_pending_gaps),
+]
+
+
+def current_version(engine: Engine) -> int:
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE IF NOT EXISTS schema_migrations "
+            "(version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at TIMESTAMP NOT NULL)"
+        )
+        return conn.exec_driver_sql("SELECT COALESCE(MAX(version), 0) FROM schema_migrations").scalar() or 0
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """Apply pending migrations in order; returns the versions applied."""
+    applied = []
+    done = current_version(engine)
+    for version, fn in MIGRATIONS:
+        if version <= done:
+            continue
+        with engine.begin() as conn:
+            fn(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": version, "n": fn.__name__, "t": datetime.utcnow()},
+            )
+        logger.info("applied migration %03d %s", version, fn.__name__)
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from .db import engine, init_db
+
+    before = current_version(engine)
+    init_db()
+    print(f"schema version {before} -> {current_version(engine)}")
@@ -2,6 +2,7 @@ from __future__ import annotations
 from datetime import date, datetime
 from enum import Enum
 from typing import Optional
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel
 
 
@@ -30,6 +31,12 @@ class Account(SQLModel, table=True):
 
 
 class Transaction(SQLModel, table=True):
+    __table_args__ = (
+        # Keyset pagination of GET /transactions (date desc, id desc), date-range scans
+        Index("ix_transaction_date_id", "date", "id"),
+        Index("ix_transaction_category_date", "category", "date"),
+        Index("ix_transaction_account_date", "account_id", "date"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     account_id: Optional[int] = Field(default=None, foreign_key="account.id")
     date: date
@@ -43,6 +50,9 @@ class Transaction(SQLModel, table=True):
 
 
 class Invoice(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_invoice_created_id", "created_at", "id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     type: InvoiceType
     due_date: date
@@ -72,16 +82,45 @@ class BudgetLine(SQLModel, table=True):
 
 
 class Document(SQLModel, table=True):
+    __table_args__ = (
+        Index("ux_document_sha256", "sha256", unique=True),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     type: Optional[str] = None
     original_filename: str
     stored_path: str
+    sha256: Optional[str] = None  # content hash of the blob (None: stored before content addressing)
+    size_bytes: Optional[int] = None
+    ref_count: int = 1  # uploads of this content
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
     transaction_id: Optional[int] = Field(default=None, foreign_key="transaction.id")
     invoice_id: Optional[int] = Field(default=None, foreign_key="invoice.id")
 
 
+class Job(SQLModel, table=True):
+    """Background job (invoice OCR), persisted so its status outlives the request and restarts.
+
+    See `services.jobs`: queued -> running -> done | failed.
+    """
+    __table_args__ = (
+        Index("ix_job_document_status", "document_id", "status"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str  # "invoice_ocr"
+    status: str = "queued"
+    document_id: Optional[int] = Field(default=None, foreign_key="document.id")
+    invoice_id: Optional[int] = Field(default=None, foreign_key="invoice.id")
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
 class ReconciliationMatch(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_reconciliationmatch_transaction", "transaction_id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     bank_ref: str
     transaction_id: Optional[int] = Field(default=None, foreign_key="transaction.id")
@@ -91,15 +130,47 @@ class ReconciliationMatch(SQLModel, table=True):
 
 
 class Alert(SQLModel, table=True):
+    """One open alert per fingerprint (type + subject), re-raised in place.
+
+    See `services.alerts`: repeats bump `occurrences` and `last_seen_at`
+    instead of inserting a new row.
+    """
+    __table_args__ = (
+        # Open alerts, newest first: the notifications list scans this index only
+        Index("ix_alert_resolved_last_seen", "resolved", "last_seen_at", "id"),
+        # At most one open alert per fingerprint: the conflict target of the upsert
+        Index("ux_alert_open_fingerprint", "fingerprint", unique=True,
+              sqlite_where=text("resolved = 0"), postgresql_where=text("NOT resolved")),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     type: str
     severity: str = "info"  # info, warning, critical
     message: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     resolved: bool = False
+    fingerprint: Optional[str] = None  # e.g. "budget_over:line:12"
+    occurrences: int = 1
+    last_seen_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class AlertArchive(SQLModel, table=True):
+    """Resolved alerts moved out of `alert` by the retention job."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    type: str
+    severity: str
+    message: str
+    created_at: datetime
+    resolved: bool = True
+    fingerprint: Optional[str] = None
+    occurrences: int = 1
+    last_seen_at: Optional[datetime] = None
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class Report(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_report_type_period", "type", "period_start", "period_end"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     type: ReportType
     period_start: date
@@ -108,7 +179,40 @@ class Report(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class MonthlyRollup(SQLModel, table=True):
+    """Pre-summed transactions per account x category x direction x month.
+
+    Maintained by `services.rollup` in the same unit of work as every write
+    path; rebuild with `python -m app.services.rollup` after backfills.
+    """
+    __table_args__ = (
+        Index("ix_monthlyrollup_month", "month"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    account_id: Optional[int] = Field(default=None, foreign_key="account.id")
+    category: Optional[str] = None
+    direction: Direction
+    month: date  # first day of the month
+    amount: float = 0.0  # native (account) currency
+    amount_base: float = 0.0  # BASE_CURRENCY, at each transaction's date rate
+    tx_count: int = 0
+
+
+class SchedulerState(SQLModel, table=True):
+    """Watermarks of a background job, so each run only handles new rows."""
+    job: str = Field(primary_key=True)
+    last_transaction_id: int = 0
+    last_budget_line_id: int = 0
+    last_full_run: Optional[datetime] = None
+    # JSON [[first_id, last_id, first_seen], ...]: ids below the watermark not committed yet
+    pending_gaps: str = "[]"
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class User(SQLModel, table=True):
+    __table_args__ = (
+        Index("ux_user_email", "email", unique=True),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     email: str
     hashed_password: str
@@ -117,7 +221,13 @@ class User(SQLModel, table=True):
 
 
 class ExchangeRate(SQLModel, table=True):
+    __table_args__ = (
+        # One rate per currency and day; POST /fx/rates updates it in place
+        Index("ux_exchangerate_currency_date", "currency", "date", unique=True),
+        Index("ix_exchangerate_updated_at", "updated_at"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     currency: str  # e.g. "USD"
     date: date
     rate_to_base: float  # how many BASE currency units for 1 unit of currency
+    updated_at: datetime = Field(default_factory=datetime.utcnow)  # part of rollup.ledger_version
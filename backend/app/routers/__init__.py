@@ -11,3 +11,4 @@ from .invoices import router as invoices
 from .fx import router as fx
 from .users import router as users
 from .search import router as search
+from .async_reads import router as async_reads
@@ -0,0 +1,83 @@
+"""Async variants of the hot read endpoints, mounted ahead of the sync routers when ASYNC_DB is set.
+
+Same paths, parameters and payloads as the sync routes; each one runs the
+sync handler's body on an AsyncSession through `run_sync`, so database waits
+are awaited on the event loop instead of holding a threadpool worker. The
+handlers are called with keyword arguments, so a reordered or added sync
+parameter cannot shift the values.
+"""
+from datetime import date
+from typing import Dict, Optional
+from fastapi import APIRouter, Depends, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..db import get_async_session
+from ..models import Direction
+from ..services.security import get_current_user_async
+from .notifications import list_alerts as sync_list_alerts
+from .reports import annual_report as sync_annual, monthly_report as sync_monthly, quarterly_report as sync_quarterly
+from .search import search as sync_search
+from .transactions import list_transactions as sync_list_transactions
+
+router = APIRouter(tags=["async"])
+
+
+@router.get("/transactions/")
+async def list_transactions(
+    response: Response,
+    session: AsyncSession = Depends(get_async_session),
+    account_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    category: Optional[str] = None,
+    direction: Optional[Direction] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    return await session.run_sync(
+        lambda s: sync_list_transactions(
+            response=response, session=s, account_id=account_id, date_from=date_from, date_to=date_to,
+            category=category, direction=direction, limit=limit, cursor=cursor, fields=fields,
+        )
+    )
+
+
+@router.get("/reports/monthly")
+async def monthly_report(
+    year: int, month: int, session: AsyncSession = Depends(get_async_session), user=Depends(get_current_user_async)
+) -> Dict:
+    return await session.run_sync(lambda s: sync_monthly(year=year, month=month, session=s, user=user))
+
+
+@router.get("/reports/quarterly")
+async def quarterly_report(year: int, quarter: int, session: AsyncSession = Depends(get_async_session)) -> Dict:
+    return await session.run_sync(lambda s: sync_quarterly(year=year, quarter=quarter, session=s))
+
+
+@router.get("/reports/annual")
+async def annual_report(year: int, session: AsyncSession = Depends(get_async_session)) -> Dict:
+    return await session.run_sync(lambda s: sync_annual(year=year, session=s))
+
+
+@router.get("/search/")
+async def search(q: str, session: AsyncSession = Depends(get_async_session)) -> Dict:
+    return await session.run_sync(lambda s: sync_search(q=q, session=s))
+
+
+@router.get("/notifications/")
+async def list_alerts(
+    response: Response,
+    resolved: bool = False,
+    type: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
+    user=Depends(get_current_user_async),
+):
+    return await session.run_sync(
+        lambda s: sync_list_alerts(
+            response=response, resolved=resolved, type=type, limit=limit, cursor=cursor, fields=fields,
+            session=s, user=user,
+        )
+    )
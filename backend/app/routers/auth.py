@@ -1,36 +1,48 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import Session, select
 from ..db import get_session
 from ..models import User
-from ..services.security import hash_password, verify_password, create_access_token
+from ..services.security import hash_password_async, verify_password_async, create_access_token
 from ..services.security import get_current_user
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-@router.post("/signup")
-def signup(email: str, password: str, session: Session = Depends(get_session)):
-    if session.exec(select(User).where(User.email == email)).first():
-        raise HTTPException(status_code=400, detail="User already exists")
+def _find_user(session: Session, email: str):
+    return session.exec(select(User).where(User.email == email)).first()
+
+
+def _create_user(session: Session, email: str, hashed: str):
     first_user = session.exec(select(User)).first() is None
     role = "admin" if first_user else "user"
-    user = User(email=email, hashed_password=hash_password(password), role=role)
+    user = User(email=email, hashed_password=hashed, role=role)
     session.add(user)
     session.commit()
     session.refresh(user)
     return {"id": user.id, "email": user.email}
 
 
+# async routes: queries go to the threadpool and pbkdf2 to the bounded hashing pool,
+# so a burst of logins neither blocks the event loop nor takes every worker thread
+@router.post("/signup")
+async def signup(email: str, password: str, session: Session = Depends(get_session)):
+    if await run_in_threadpool(_find_user, session, email):
+        raise HTTPException(status_code=400, detail="User already exists")
+    hashed = await hash_password_async(password)
+    return await run_in_threadpool(_create_user, session, email, hashed)
+
+
 @router.post("/login")
-def login(form: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
-    user = session.exec(select(User).where(User.email == form.username)).first()
-    if not user or not verify_password(form.password, user.hashed_password):
+async def login(form: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
+    user = await run_in_threadpool(_find_user, session, form.username)
+    if not user or not await verify_password_async(form.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     token = create_access_token(user.email)
     return {"access_token": token, "token_type": "bearer"}
 
 
 @router.get("/me")
-def me(current = Depends(get_current_user)):
+async def me(current = Depends(get_current_user)):
     return {"email": current.email, "role": current.role}
@@ -1,17 +1,32 @@
-from fastapi import APIRouter, Depends
-from typing import List
+from fastapi import APIRouter, Depends, Response
+from typing import List, Optional
 from sqlmodel import select, Session
 from datetime import date as dt_date
 from ..db import get_session
 from ..models import Budget, BudgetLine
 from ..services.security import require_roles
+from ..services.pagination import keyset_page
 
 router = APIRouter(prefix="/budgets", tags=["budgets"])
 
 
-@router.get("/", response_model=List[Budget])
-def list_budgets(session: Session = Depends(get_session)):
-    return session.exec(select(Budget)).all()
+@router.get("/")
+def list_budgets(
+    response: Response,
+    session: Session = Depends(get_session),
+    active_from: Optional[dt_date] = None,
+    active_to: Optional[dt_date] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    # Budgets whose period overlaps [active_from, active_to]
+    where = []
+    if active_from:
+        where.append(Budget.end_date >= active_from)
+    if active_to:
+        where.append(Budget.start_date <= active_to)
+    return keyset_page(session, Budget, response, [(Budget.id, False)], where, limit, cursor, fields)
 
 
 @router.post("/", response_model=Budget)
@@ -1,24 +1,61 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlmodel import Session, select
 from ..db import get_session
 from ..models import ExchangeRate
-from datetime import date
+from datetime import date, datetime
 from ..services.security import require_admin
+from ..services.fx import invalidate_rates
+from ..services.rollup import rebuild_rollups
+from ..services.scheduler import mark_budgets_dirty
+from ..services.snapshots import invalidate_range
+from ..services.pagination import keyset_page
 
 router = APIRouter(prefix="/fx", tags=["fx"])
 
 
 @router.get("/rates")
-def list_rates(session: Session = Depends(get_session)):
-    return session.exec(select(ExchangeRate).order_by(ExchangeRate.currency, ExchangeRate.date.desc())).all()
+def list_rates(
+    response: Response,
+    session: Session = Depends(get_session),
+    currency: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+    fields: str | None = None,
+):
+    where = []
+    if currency:
+        where.append(ExchangeRate.currency == currency.upper())
+    if date_from:
+        where.append(ExchangeRate.date >= date_from)
+    if date_to:
+        where.append(ExchangeRate.date <= date_to)
+    order = [(ExchangeRate.currency, False), (ExchangeRate.date, True), (ExchangeRate.id, True)]
+    return keyset_page(session, ExchangeRate, response, order, where, limit, cursor, fields)
 
 
 @router.post("/rates")
 def upsert_rate(currency: str, rate_to_base: float, on_date: date | None = None, session: Session = Depends(get_session), admin=Depends(require_admin)):
     d = on_date or date.today()
-    # simple insert; in real life unique constraint (currency,date)
-    r = ExchangeRate(currency=currency.upper(), date=d, rate_to_base=rate_to_base)
+    # One rate per currency and day (unique index): replace the day's rate if there is one
+    r = session.exec(select(ExchangeRate).where(ExchangeRate.currency == currency.upper(), ExchangeRate.date == d)).first()
+    if r:
+        r.rate_to_base = rate_to_base
+        r.updated_at = datetime.utcnow()
+    else:
+        r = ExchangeRate(currency=currency.upper(), date=d, rate_to_base=rate_to_base)
     session.add(r)
+    # Budget spend is converted at these rates: recompute it on the next check
+    mark_budgets_dirty(session)
     session.commit()
+    invalidate_rates()
+    # The rate applies from its date until the currency's next rate: drop report snapshots in between
+    next_d = session.exec(
+        select(ExchangeRate.date).where(ExchangeRate.currency == r.currency, ExchangeRate.date > d).order_by(ExchangeRate.date)
+    ).first()
+    invalidate_range(session, d, next_d)
+    # Base-currency rollup amounts from this date on were priced with the old rate
+    rebuild_rollups(session, since=d, currency=r.currency)
     session.refresh(r)
     return r
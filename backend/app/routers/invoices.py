@@ -1,51 +1,87 @@
-from fastapi import APIRouter, UploadFile, File, Depends
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Response
 from sqlmodel import Session
 from ..db import get_session
-from ..models import Invoice, Document, InvoiceType
-from ..services.ocr import extract_text_from_pdf, parse_invoice_text
-from datetime import datetime
-import os
-from ..services.security import require_roles
+from ..models import Invoice, InvoiceType, Job
+from datetime import date
+from typing import Dict, List, Optional
+from ..services.jobs import job_status, submit_invoice_ocr
+from ..services.security import get_current_user, require_roles
+from ..services.pagination import keyset_page
+from ..services.storage import DUPLICATE_MODES, store_upload
 
 router = APIRouter(prefix="/invoices", tags=["invoices"])
 
-STORAGE_DIR = os.path.join("storage", "docs")
-
 
 @router.get("/")
-def list_invoices(session: Session = Depends(get_session)):
-    from sqlmodel import select
-    return session.exec(select(Invoice).order_by(Invoice.created_at.desc())).all()
-
-
-@router.post("/ocr")
-def ocr_invoice(file: UploadFile = File(...), session: Session = Depends(get_session), user=Depends(require_roles(["admin","finance_manager","accountant"]))):
-    # Save file
-    ts = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
-    stored_name = f"{ts}_{file.filename}"
-    stored_path = os.path.join(STORAGE_DIR, stored_name)
-    with open(stored_path, "wb") as f:
-        f.write(file.file.read())
+def list_invoices(
+    response: Response,
+    session: Session = Depends(get_session),
+    status: Optional[str] = None,
+    type: Optional[InvoiceType] = None,
+    due_from: Optional[date] = None,
+    due_to: Optional[date] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    where = []
+    if status:
+        where.append(Invoice.status == status)
+    if type:
+        where.append(Invoice.type == type)
+    if due_from:
+        where.append(Invoice.due_date >= due_from)
+    if due_to:
+        where.append(Invoice.due_date <= due_to)
+    order = [(Invoice.created_at, True), (Invoice.id, True)]
+    return keyset_page(session, Invoice, response, order, where, limit, cursor, fields)
+
+
+def _queue_ocr(session: Session, file: UploadFile, on_duplicate: str) -> Dict:
     # OCR only PDF in POC
-    if not stored_path.lower().endswith(".pdf"):
-        return {"error": "Seuls les PDF sont traités dans ce POC"}
-    with open(stored_path, 'rb') as fh:
-        upload = UploadFile(filename=file.filename, file=fh)
-        text = extract_text_from_pdf(upload)
-    data = parse_invoice_text(text)
-    inv = Invoice(
-        type=InvoiceType.payable,
-        due_date=datetime.strptime(data.get("due_date"), "%Y-%m-%d").date() if data.get("due_date") else datetime.utcnow().date(),
-        amount=float(data.get("amount") or 0.0),
-        currency=(data.get("currency") or "EUR").upper(),
-        counterparty=data.get("counterparty") or None,
-        status="open",
-        file_path=stored_path,
-    )
-    session.add(inv)
-    session.commit()
-    session.refresh(inv)
-    doc = Document(original_filename=file.filename, stored_path=stored_path, invoice_id=inv.id, type="invoice")
-    session.add(doc)
-    session.commit()
-    return inv
+    if not (file.filename or "").lower().endswith(".pdf"):
+        return {"filename": file.filename, "error": "Seuls les PDF sont traités dans ce POC"}
+    doc, duplicate = store_upload(session, file, link_duplicates=on_duplicate == "link", type="invoice")
+    if duplicate and on_duplicate == "reject":
+        return {"filename": file.filename, "error": f"Document déjà stocké (id {doc.id})", "document_id": doc.id}
+    return {"filename": file.filename, "duplicate": duplicate, **job_status(submit_invoice_ocr(session, doc))}
+
+
+@router.post("/ocr", status_code=202)
+def ocr_invoice(
+    file: UploadFile = File(...),
+    on_duplicate: str = "link",
+    session: Session = Depends(get_session),
+    user=Depends(require_roles(["admin","finance_manager","accountant"])),
+) -> Dict:
+    """Queue the OCR of a PDF invoice; poll GET /invoices/jobs/{job_id} for the invoice."""
+    if on_duplicate not in DUPLICATE_MODES:
+        raise HTTPException(status_code=400, detail=f"on_duplicate in {DUPLICATE_MODES}")
+    result = _queue_ocr(session, file, on_duplicate)
+    if "job_id" not in result:
+        raise HTTPException(status_code=409 if "document_id" in result else 400, detail=result["error"])
+    return result
+
+
+@router.post("/ocr/batch", status_code=202)
+def ocr_invoices_batch(
+    files: List[UploadFile] = File(...),
+    on_duplicate: str = "link",
+    session: Session = Depends(get_session),
+    user=Depends(require_roles(["admin","finance_manager","accountant"])),
+) -> Dict:
+    """Queue one OCR job per PDF; files that cannot be queued carry an `error` instead of a `job_id`."""
+    if on_duplicate not in DUPLICATE_MODES:
+        raise HTTPException(status_code=400, detail=f"on_duplicate in {DUPLICATE_MODES}")
+    return {"items": [_queue_ocr(session, f, on_duplicate) for f in files]}
+
+
+@router.get("/jobs/{job_id}")
+def ocr_job(job_id: int, session: Session = Depends(get_session), user=Depends(get_current_user)) -> Dict:
+    job = session.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    result = job_status(job)
+    if job.invoice_id is not None:
+        result["invoice"] = session.get(Invoice, job.invoice_id)
+    return result
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, UploadFile, File, Depends
+from fastapi import APIRouter, UploadFile, File, Depends, Response
+from typing import Optional
 from sqlmodel import Session
 from ..db import get_session
 from ..models import Alert
@@ -8,10 +9,25 @@ router = APIRouter(prefix="/notifications", tags=["notifications"])
 
 
 from ..services.security import get_current_user
+from ..services.pagination import keyset_page
 
 @router.get("/")
-def list_alerts(session: Session = Depends(get_session), user=Depends(get_current_user)):
-    return session.exec(select(Alert).order_by(Alert.created_at.desc())).all()
+def list_alerts(
+    response: Response,
+    resolved: bool = False,
+    type: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    session: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    # Served from ix_alert_resolved_last_seen: open alerts by default, most recently seen first
+    where = [Alert.resolved == resolved]
+    if type:
+        where.append(Alert.type == type)
+    order = [(Alert.last_seen_at, True), (Alert.id, True)]
+    return keyset_page(session, Alert, response, order, where, limit, cursor, fields)
 
 @router.patch("/{alert_id}/resolve")
 def resolve_alert(alert_id: int, session: Session = Depends(get_session), user=Depends(get_current_user)):
@@ -1,24 +1,58 @@
-from fastapi import APIRouter, UploadFile, File, Depends
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
-from ..db import get_session
-import csv, io, json
-from ..services.recon import parse_bank_rows, match_rows
+from ..db import get_session, engine
+import itertools
+import json
+import logging
+import os
+from ..core.config import settings
+from ..services.recon import iter_statement_chunks, ingest_statement
 from ..services.security import require_roles
 
 router = APIRouter(prefix="/reconciliation", tags=["reconciliation"])
+logger = logging.getLogger(__name__)
+
+
+def _invalid(filename: str, e: ValueError, processed: int) -> HTTPException:
+    """400 for a statement that is not valid UTF-8 CSV / a JSON array; lines before the error stay matched."""
+    logger.warning("statement %s unreadable after %d lines: %s", filename, processed, e)
+    return HTTPException(status_code=400, detail=f"Relevé illisible (CSV UTF-8 ou tableau JSON attendu) après {processed} lignes")
 
 
 @router.post("/upload")
-def upload_statement(file: UploadFile = File(...), session: Session = Depends(get_session), user=Depends(require_roles(["admin","finance_manager","accountant"]))):
-    content = file.file.read()
-    rows = []
-    if file.filename.endswith(".csv"):
-        reader = csv.DictReader(io.StringIO(content.decode("utf-8")))
-        rows = [r for r in reader]
-    elif file.filename.endswith(".json"):
-        rows = json.loads(content.decode("utf-8"))
-    else:
+def upload_statement(file: UploadFile = File(...), progress: bool = False, session: Session = Depends(get_session), user=Depends(require_roles(["admin","finance_manager","accountant"]))):
+    if not file.filename.endswith((".csv", ".json")):
         return {"error": "format non supporté (csv,json)"}
-    parsed = parse_bank_rows(rows)
-    matches = match_rows(session, parsed)
-    return {"matched": sum(1 for m in matches if m.status=="matched"), "total": len(matches)}
+    if progress:
+        # The upload is closed once this function returns, before the response
+        # body streams: keep our own handle on the spooled temp file.
+        fh = os.fdopen(os.dup(file.file.fileno()), "rb")
+        chunks = iter_statement_chunks(fh, file.filename, settings.RECON_CHUNK_ROWS)
+        # Parse the first chunk now, so a file that is not a statement gets a 400, not a 200 stream
+        try:
+            first = list(itertools.islice(chunks, 1))
+        except ValueError as e:
+            fh.close()
+            raise _invalid(file.filename, e, 0)
+
+        # NDJSON: one running-total line per chunk, then the final summary
+        def events():
+            last = {"processed": 0, "matched": 0}
+            with fh, Session(engine) as s:
+                try:
+                    for last in ingest_statement(s, itertools.chain(first, chunks)):
+                        yield json.dumps(last) + "\n"
+                except ValueError as e:
+                    yield json.dumps({**last, "error": _invalid(file.filename, e, last["processed"]).detail, "done": True}) + "\n"
+                    return
+            yield json.dumps({"matched": last["matched"], "total": last["processed"], "done": True}) + "\n"
+        return StreamingResponse(events(), media_type="application/x-ndjson")
+    chunks = iter_statement_chunks(file.file, file.filename, settings.RECON_CHUNK_ROWS)
+    last = {"processed": 0, "matched": 0}
+    try:
+        for last in ingest_statement(session, chunks):
+            logger.info("statement %s: %d lines processed, %d matched", file.filename, last["processed"], last["matched"])
+    except ValueError as e:
+        raise _invalid(file.filename, e, last["processed"])
+    return {"matched": last["matched"], "total": last["processed"]}
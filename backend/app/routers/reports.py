@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends
-from datetime import date
+from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, timedelta
 from typing import Dict
-from sqlmodel import select, func
 from ..db import get_session
-from ..models import Transaction, Direction, Account, Budget, BudgetLine
+from ..models import Budget
 from sqlmodel import Session, select
-from ..services.fx import convert
+from ..services.snapshots import cached_period_totals
+from ..services.narratives import FAILED, NARRATIVE_ERROR, request_narrative, get_narrative
 from ..services.security import get_current_user
 
 router = APIRouter(prefix="/reports", tags=["reports"])
@@ -16,45 +16,33 @@ def monthly_report(year: int, month: int, session: Session = Depends(get_session
     start = date(year, month, 1)
     end = date(year + (1 if month == 12 else 0), (1 if month == 12 else month + 1), 1)
 
-    # Fetch transactions and convert amounts to base currency
-    txs = session.exec(
-        select(Transaction).where(
-            Transaction.date >= start,
-            Transaction.date < end,
-        )
-    ).all()
-    # build account cache
-    acc_cache: dict[int, Account] = {}
-    income = 0.0
-    expense = 0.0
-    for t in txs:
-        if t.account_id and t.account_id not in acc_cache:
-            acc_cache[t.account_id] = session.get(Account, t.account_id)
-        currency = acc_cache[t.account_id].currency if t.account_id else "EUR"
-        amt = convert(session, t.amount, currency, t.date)
-        if t.direction == Direction.income:
-            income += amt
-        else:
-            expense += amt
+    income, expense = cached_period_totals(session, start, end)
     net = income - expense
 
-    # Generate a narrative via CrewAI orchestrated agent
-    from ..agents.crew import summarize_with_crew
-
-    narrative = summarize_with_crew({
-        "income": float(income or 0),
-        "expense": float(expense or 0),
-        "net": float(net),
-        "year": year,
-        "month": month,
-    })
+    # Narrative is generated in the background; fetch it from /reports/monthly/narrative
+    narrative = request_narrative(session, start, end - timedelta(days=1), income, expense, net)
 
     return {
         "period": {"year": year, "month": month},
         "income": income or 0,
         "expense": expense or 0,
         "net": net,
-        "narrative": narrative,
+        **narrative,
+    }
+
+
+@router.get("/monthly/narrative")
+def monthly_narrative(year: int, month: int, session: Session = Depends(get_session), user=Depends(get_current_user)) -> Dict:
+    start = date(year, month, 1)
+    end = date(year + (1 if month == 12 else 0), (1 if month == 12 else month + 1), 1)
+    stored = get_narrative(session, start, end - timedelta(days=1))
+    if not stored:
+        raise HTTPException(404, "Aucune synthèse demandée pour cette période")
+    return {
+        "period": {"year": year, "month": month},
+        "narrative_status": stored.get("narrative_status"),
+        "narrative": stored.get("narrative"),
+        "error": NARRATIVE_ERROR if stored.get("narrative_status") == FAILED else None,
     }
 
 
@@ -71,24 +59,7 @@ def quarterly_report(year: int, quarter: int, session: Session = Depends(get_ses
     else:
         end = dt_date(year, start_month + 3, 1)
 
-    txs = session.exec(
-        select(Transaction).where(
-            Transaction.date >= start,
-            Transaction.date < end,
-        )
-    ).all()
-    acc_cache: dict[int, Account] = {}
-    income = 0.0
-    expense = 0.0
-    for t in txs:
-        if t.account_id and t.account_id not in acc_cache:
-            acc_cache[t.account_id] = session.get(Account, t.account_id)
-        currency = acc_cache[t.account_id].currency if t.account_id else "EUR"
-        amt = convert(session, t.amount, currency, t.date)
-        if t.direction == Direction.income:
-            income += amt
-        else:
-            expense += amt
+    income, expense = cached_period_totals(session, start, end)
     net = income - expense
     return {
         "year": year,
@@ -104,25 +75,7 @@ def annual_report(year: int, session: Session = Depends(get_session)) -> Dict:
     start = dt_date(year, 1, 1)
     end = dt_date(year + 1, 1, 1)
 
-    # Aggregate transactions in base currency
-    txs = session.exec(
-        select(Transaction).where(
-            Transaction.date >= start,
-            Transaction.date < end,
-        )
-    ).all()
-    acc_cache: dict[int, Account] = {}
-    income = 0.0
-    expense = 0.0
-    for t in txs:
-        if t.account_id and t.account_id not in acc_cache:
-            acc_cache[t.account_id] = session.get(Account, t.account_id)
-        currency = acc_cache[t.account_id].currency if t.account_id else "EUR"
-        amt = convert(session, t.amount, currency, t.date)
-        if t.direction == Direction.income:
-            income += amt
-        else:
-            expense += amt
+    income, expense = cached_period_totals(session, start, end)
     net = income - expense
 
     # Annual budget: sum budgets overlapping the year (simple sum for POC)
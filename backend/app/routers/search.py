@@ -2,53 +2,74 @@ from fastapi import APIRouter, Depends
 from sqlmodel import Session, select
 from ..db import get_session
 from ..models import Transaction, Invoice, Budget, Document
+from ..services.search_index import MIN_TERM, search_ids
 from typing import Dict
 
 router = APIRouter(prefix="/search", tags=["search"])
 
+MODELS = {"transaction": Transaction, "invoice": Invoice, "budget": Budget, "document": Document}
+KEYS = {"transaction": "transactions", "invoice": "invoices", "budget": "budgets", "document": "documents"}
 
-def _like(field, q: str):
-    # portable LIKE with wildcards around q
-    return field.ilike(f"%{q}%") if hasattr(field, 'ilike') else field.contains(q)
 
+def _label(kind: str, obj) -> str:
+    if kind == "transaction":
+        return " · ".join(x for x in (obj.description, obj.category) if x)
+    if kind == "invoice":
+        return obj.counterparty or ""
+    if kind == "budget":
+        return obj.name
+    return obj.original_filename
 
-@router.get("/")
-def search(q: str, session: Session = Depends(get_session)) -> Dict:
-    q = q.strip()
-    if not q:
-        return {"transactions": [], "invoices": [], "budgets": [], "documents": []}
 
+def _like_search(session: Session, q: str) -> Dict:
+    # Queries too short for the trigram index: plain substring scans
     txs = session.exec(
         select(Transaction)
         .where((Transaction.description.ilike(f"%{q}%")) | (Transaction.category.ilike(f"%{q}%")))
         .order_by(Transaction.date.desc())
         .limit(10)
     ).all()
-
     invs = session.exec(
-        select(Invoice)
-        .where((Invoice.counterparty.ilike(f"%{q}%")))
-        .order_by(Invoice.created_at.desc())
-        .limit(10)
+        select(Invoice).where(Invoice.counterparty.ilike(f"%{q}%")).order_by(Invoice.created_at.desc()).limit(10)
     ).all()
-
     buds = session.exec(
-        select(Budget)
-        .where(Budget.name.ilike(f"%{q}%"))
-        .order_by(Budget.start_date.desc())
-        .limit(10)
+        select(Budget).where(Budget.name.ilike(f"%{q}%")).order_by(Budget.start_date.desc()).limit(10)
     ).all()
-
     docs = session.exec(
-        select(Document)
-        .where(Document.original_filename.ilike(f"%{q}%"))
-        .order_by(Document.uploaded_at.desc())
-        .limit(10)
+        select(Document).where(Document.original_filename.ilike(f"%{q}%")).order_by(Document.uploaded_at.desc()).limit(10)
     ).all()
+    found = {"transactions": txs, "invoices": invs, "budgets": buds, "documents": docs}
+    results = [
+        {"type": kind, "id": o.id, "score": None, "label": _label(kind, o)}
+        for kind, key in KEYS.items() for o in found[key]
+    ]
+    return {**found, "results": results}
+
+
+@router.get("/")
+def search(q: str, session: Session = Depends(get_session)) -> Dict:
+    """Search transactions, invoices, budgets and documents.
+
+    Per-type lists (up to 10 each) plus `results`, the same hits merged into
+    one list ranked by relevance (BM25 over the trigram search index).
+    """
+    q = q.strip()
+    if not q:
+        return {"transactions": [], "invoices": [], "budgets": [], "documents": [], "results": []}
+    hits = search_ids(session, q)
+    if not hits and len(max(q.split(), key=len)) < MIN_TERM:
+        return _like_search(session, q)
 
-    return {
-        "transactions": txs,
-        "invoices": invs,
-        "budgets": buds,
-        "documents": docs,
-    }
+    objs: Dict[str, Dict[int, object]] = {}
+    for kind, model in MODELS.items():
+        ids = [i for k, i, _ in hits if k == kind]
+        objs[kind] = {o.id: o for o in session.exec(select(model).where(model.id.in_(ids))).all()} if ids else {}
+    out: Dict = {key: [] for key in KEYS.values()}
+    results = []
+    for kind, i, score in hits:
+        o = objs[kind].get(i)
+        if o is None:
+            continue
+        out[KEYS[kind]].append(o)
+        results.append({"type": kind, "id": i, "score": round(score, 4), "label": _label(kind, o)})
+    return {**out, "results": results}
@@ -1,27 +1,50 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
-from typing import List, Optional
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Response
+from fastapi.responses import FileResponse
+from typing import Dict, List, Optional
 from datetime import date
 from sqlmodel import select
+from sqlalchemy import update
 from ..db import get_session
 from ..models import Transaction, Direction
 from sqlmodel import Session
-import csv
-import io
+import os
 from ..services.security import get_current_user
+from ..services.rollup import apply_transactions, apply_rows
+from ..services.importer import import_transactions_csv, ERRORS_DIR
+from ..services.pagination import keyset_page
+from ..services.scheduler import mark_budgets_dirty
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
+UPDATE_CHUNK_IDS = 5000  # ids per categorize UPDATE (bound parameter limits)
 
-@router.get("/", response_model=List[Transaction])
+
+@router.get("/")
 def list_transactions(
+    response: Response,
     session: Session = Depends(get_session),
     account_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    category: Optional[str] = None,
+    direction: Optional[Direction] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
 ):
-    query = select(Transaction)
+    where = []
     if account_id:
-        query = query.where(Transaction.account_id == account_id)
-    results = session.exec(query.order_by(Transaction.date.desc(), Transaction.id.desc())).all()
-    return results
+        where.append(Transaction.account_id == account_id)
+    if date_from:
+        where.append(Transaction.date >= date_from)
+    if date_to:
+        where.append(Transaction.date <= date_to)
+    if category:
+        where.append(Transaction.category == category)
+    if direction:
+        where.append(Transaction.direction == direction)
+    order = [(Transaction.date, True), (Transaction.id, True)]
+    return keyset_page(session, Transaction, response, order, where, limit, cursor, fields)
 
 
 from ..services.security import require_roles
@@ -39,6 +62,7 @@ def create_transaction(
     if isinstance(tx.date, str):
         tx.date = date.fromisoformat(tx.date)
     session.add(tx)
+    apply_transactions(session, [tx])
     session.commit()
     session.refresh(tx)
     return tx
@@ -53,37 +77,32 @@ def import_csv(
 ):
     if not file.filename.endswith((".csv", ".txt")):
         raise HTTPException(status_code=400, detail="Unsupported file type")
+    result = import_transactions_csv(session, file.file, account_id)
+    if result["errors_file"]:
+        result["errors_file"] = f"/transactions/import_errors/{result['errors_file']}"
+    return result
 
-    content = file.file.read().decode("utf-8")
-    reader = csv.DictReader(io.StringIO(content))
-    created = 0
-    for row in reader:
-        try:
-            amount = float(row.get("amount") or row.get("Amount"))
-            direction = Direction.expense if amount < 0 else Direction.income
-            tx = Transaction(
-                account_id=account_id,
-                date=date.fromisoformat(row.get("date") or row.get("Date")),
-                amount=abs(amount),
-                direction=direction,
-                category=row.get("category") or None,
-                description=row.get("description") or row.get("Description"),
-            )
-            session.add(tx)
-            created += 1
-        except Exception:  # noqa: BLE001
-            continue
-    session.commit()
-    return {"imported": created}
+
+@router.get("/import_errors/{name}")
+def import_errors(name: str, user=Depends(require_roles(["admin","finance_manager","accountant"]))):
+    path = os.path.join(ERRORS_DIR, os.path.basename(name))
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Error report not found")
+    return FileResponse(path, media_type="text/csv", filename=os.path.basename(path))
 
 @router.post("/categorize")
 
 def categorize_uncategorized(session: Session = Depends(get_session), user=Depends(require_roles(["admin","finance_manager","accountant"]))):
     from ..agents.crew import categorize_with_crew
+    from ..services import ml_categorizer
 
-    txs = session.exec(select(Transaction).where(Transaction.category.is_(None))).all()
+    txs = session.exec(
+        select(Transaction.id, Transaction.account_id, Transaction.date, Transaction.amount,
+               Transaction.direction, Transaction.description)
+        .where(Transaction.category.is_(None))
+    ).all()
     if not txs:
-        return {"updated": 0}
+        return {"updated": 0, "local": 0, "llm": 0}
 
     rows = [
         {
@@ -95,9 +114,41 @@ def categorize_uncategorized(session: Session = Depends(get_session), user=Depen
         }
         for t in txs
     ]
-    cats = categorize_with_crew(rows)
-    for tx, cat in zip(txs, cats):
-        tx.category = cat
-        session.add(tx)
+    # Local model first; only the rows it is unsure about go to the LLM
+    cats = ml_categorizer.predict_confident(session, rows)
+    pending = [i for i, c in enumerate(cats) if c is None]
+    if pending:
+        llm_cats = categorize_with_crew([rows[i] for i in pending])
+        answered = [(i, cat) for i, cat in zip(pending, llm_cats) if cat is not None]
+        for i, cat in answered:
+            cats[i] = cat
+        # Only real answers train the local model; unanswered rows stay NULL for the next run
+        if answered:
+            ml_categorizer.learn(session, [rows[i] for i, _ in answered], [cat for _, cat in answered])
+
+    # One UPDATE per category, only on rows still uncategorized (a concurrent run may
+    # have taken some): the rollup moves from "no category" for the rows it returns
+    table = Transaction.__table__
+    by_cat: Dict[str, List[int]] = {}
+    for t, cat in zip(txs, cats):
+        if cat is not None:
+            by_cat.setdefault(cat, []).append(t.id)
+    by_id = {t.id: t for t in txs}
+    moved = []
+    for cat, ids in by_cat.items():
+        for start in range(0, len(ids), UPDATE_CHUNK_IDS):
+            done = session.execute(
+                update(table)
+                .where(table.c.id.in_(ids[start:start + UPDATE_CHUNK_IDS]), table.c.category.is_(None))
+                .values(category=cat)
+                .returning(table.c.id)
+            ).scalars().all()
+            moved += [(by_id[i], cat) for i in done]
+    before = [{"account_id": t.account_id, "category": None, "direction": t.direction, "date": t.date, "amount": t.amount} for t, _ in moved]
+    apply_rows(session, before, sign=-1)
+    apply_rows(session, [{**r, "category": cat} for r, (_, cat) in zip(before, moved)])
+    if moved:
+        mark_budgets_dirty(session)
     session.commit()
-    return {"updated": len(cats)}
+    local = len(cats) - len(pending)
+    return {"updated": len(moved), "local": local, "llm": sum(c is not None for c in cats) - local}
@@ -1,15 +1,24 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
 from sqlmodel import Session
 from ..db import get_session
-from ..services.treasury import monthly_net_series, forecast_next
+from ..services.treasury import cached_forecast
+from ..services.forecasting import forecast_groups, GROUPS, METHODS
 
 router = APIRouter(prefix="/treasury", tags=["treasury"])
 
 
 @router.get("/forecast")
-def forecast(session: Session = Depends(get_session)):
-    series = monthly_net_series(session)
-    xs = list(series.keys())
-    ys = list(series.values())
-    preds = forecast_next(ys, periods=3)
-    return {"months": xs, "values": ys, "forecast": preds}
+def forecast(
+    group_by: Optional[str] = None,
+    periods: int = 3,
+    method: str = "ses",
+    session: Session = Depends(get_session),
+):
+    periods = max(1, min(periods, 36))
+    if group_by is None:
+        series, preds = cached_forecast(session, periods=periods)
+        return {"months": list(series.keys()), "values": list(series.values()), "forecast": preds}
+    if group_by not in GROUPS or method not in METHODS:
+        raise HTTPException(status_code=400, detail=f"group_by in {GROUPS}, method in {METHODS}")
+    return forecast_groups(session, group_by, periods=periods, method=method)
@@ -1,15 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlmodel import Session, select
 from ..db import get_session
 from ..models import User
-from ..services.security import require_admin, hash_password
+from ..services.security import ROLES, principals, require_admin, hash_password
+from ..services.pagination import keyset_page
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/")
-def list_users(session: Session = Depends(get_session), admin=Depends(require_admin)):
-    return session.exec(select(User).order_by(User.id)).all()
+def list_users(
+    response: Response,
+    role: str | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+    fields: str | None = None,
+    session: Session = Depends(get_session),
+    admin=Depends(require_admin),
+):
+    where = [User.role == role] if role else []
+    return keyset_page(session, User, response, [(User.id, False)], where, limit, cursor, fields)
 
 
 @router.post("/")
@@ -32,9 +42,25 @@ def set_active(user_id: int, is_active: bool, session: Session = Depends(get_ses
     session.add(user)
     session.commit()
     session.refresh(user)
+    principals.invalidate_user(user.id)
     return {"id": user.id, "is_active": user.is_active}
 
 
+@router.patch("/{user_id}/role")
+def set_role(user_id: int, role: str, session: Session = Depends(get_session), admin=Depends(require_admin)):
+    if role not in ROLES:
+        raise HTTPException(status_code=400, detail=f"Unknown role, expected one of: {', '.join(ROLES)}")
+    user = session.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    user.role = role
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    principals.invalidate_user(user.id)
+    return {"id": user.id, "role": user.role}
+
+
 @router.delete("/{user_id}")
 def delete_user(user_id: int, session: Session = Depends(get_session), admin=Depends(require_admin)):
     user = session.get(User, user_id)
@@ -42,4 +68,5 @@ def delete_user(user_id: int, session: Session = Depends(get_session), admin=Dep
         raise HTTPException(status_code=404, detail="User not found")
     session.delete(user)
     session.commit()
+    principals.invalidate_user(user_id)
     return {"status": "deleted"}
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""Demo accounts for local use.
+
+    cd backend && python -m app.seed [--reset-passwords]
+
+Creates the missing demo users and restores their roles. Existing password
+hashes are only rewritten when they use a scheme CryptContext no longer
+accepts (or with --reset-passwords), so a run costs one pbkdf2 hash per
+created user and none otherwise. Also run at startup when SEED_DEMO_USERS is
+set.
+"""
+import sys
+from typing import Dict
+from sqlmodel import Session, select
+from .models import User
+from .services.security import hash_password, pwd_context
+
+DEMO_PASSWORD = "Passw0rd!"
+DEMO_USERS = [
+    ("admin@example.com", "admin"),
+    ("finance@example.com", "finance_manager"),
+    ("accountant@example.com", "accountant"),
+    ("user@example.com", "user"),
+]
+
+
+def _hash_ok(hashed: str) -> bool:
+    try:
+        return pwd_context.identify(hashed) is not None and not pwd_context.needs_update(hashed)
+    except ValueError:
+        return False
+
+
+def seed_demo_users(session: Session, reset_passwords: bool = False) -> Dict[str, int]:
+    """Create or repair the demo users; returns {created, updated}."""
+    existing = {u.email: u for u in session.exec(select(User).where(User.email.in_([e for e, _ in DEMO_USERS]))).all()}
+    created = updated = 0
+    for email, role in DEMO_USERS:
+        user = existing.get(email)
+        if user is None:
+            session.add(User(email=email, hashed_password=hash_password(DEMO_PASSWORD), role=role, is_active=True))
+            created += 1
+            continue
+        changed = user.role != role
+        user.role = role
+        if reset_passwords or not _hash_ok(user.hashed_password):
+            user.hashed_password = hash_password(DEMO_PASSWORD)
+            changed = True
+        if changed:
+            session.add(user)
+            updated += 1
+    session.commit()
+    return {"created": created, "updated": updated}
+
+
+if __name__ == "__main__":
+    from .db import engine, init_db
+
+    init_db()
+    with Session(engine) as s:
+        result = seed_demo_users(s, reset_passwords="--reset-passwords" in sys.argv[1:])
+    print(f"demo users: {result['created']} created, {result['updated']} updated (password {DEMO_PASSWORD})")
@@ -0,0 +1,39 @@
+from datetime import date
+from typing import Tuple
+from sqlalchemy import func
+from sqlmodel import Session, select
+from ..models import Transaction, Direction, Account
+from .fx import convert_many
+from .rollup import period_totals_from_rollup
+
+
+def period_totals(session: Session, start: date, end: date) -> Tuple[float, float]:
+    """Income and expense totals in base currency for `start <= date < end`.
+
+    Month-aligned periods are answered from the monthly rollup table. Other
+    ranges fall back to one GROUP BY query (currency x direction x date) over
+    the raw transactions; only the groups come back to Python to be converted
+    with the rate of their date, so memory depends on the number of distinct
+    days, not on row count.
+    """
+    if start.day == 1 and end.day == 1:
+        return period_totals_from_rollup(session, start, end)
+    currency = func.coalesce(Account.currency, "EUR")
+    rows = session.exec(
+        select(currency, Transaction.direction, Transaction.date, func.sum(Transaction.amount))
+        .select_from(Transaction)
+        .outerjoin(Account, Transaction.account_id == Account.id)
+        .where(Transaction.date >= start, Transaction.date < end)
+        .group_by(currency, Transaction.direction, Transaction.date)
+    ).all()
+    if not rows:
+        return 0.0, 0.0
+    amts = convert_many(session, [r[3] for r in rows], [r[0] for r in rows], [r[2] for r in rows])
+    income = 0.0
+    expense = 0.0
+    for r, amt in zip(rows, amts.tolist()):
+        if r[1] == Direction.income:
+            income += amt
+        else:
+            expense += amt
+    return income, expense
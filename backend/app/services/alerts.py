@@ -0,0 +1,80 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+from sqlalchemy import delete, func, insert, text
+from sqlmodel import Session, select
+from ..core.config import settings
+from ..models import Alert, AlertArchive
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLUMNS = ("type", "severity", "message", "created_at", "resolved", "fingerprint", "occurrences", "last_seen_at")
+
+
+@dataclass
+class AlertSignal:
+    """An alert condition seen by a check; `fingerprint` names its type and subject."""
+    fingerprint: str
+    type: str
+    severity: str
+    message: str
+
+
+def raise_alerts(session: Session, signals: Iterable[AlertSignal], now: Optional[datetime] = None) -> Dict[str, int]:
+    """Upsert alerts by fingerprint. Does not commit.
+
+    A signal whose fingerprint has an open (unresolved) alert bumps its
+    `occurrences` and `last_seen_at` and refreshes the message; any other
+    signal opens a new alert. A single INSERT ... ON CONFLICT against the
+    partial unique index `ux_alert_open_fingerprint`, so two processes
+    raising the same signal cannot both open it. Returns {"opened", "repeated"}.
+    """
+    now = now or datetime.utcnow()
+    by_fp = {s.fingerprint: s for s in signals}
+    if not by_fp:
+        return {"opened": 0, "repeated": 0}
+    # The conflict target must repeat the index predicate as written (see models.Alert)
+    if session.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as upsert
+        open_only = text("resolved = 0")
+    else:
+        from sqlalchemy.dialects.postgresql import insert as upsert
+        open_only = text("NOT resolved")
+    table = Alert.__table__
+    rows = [
+        {"type": s.type, "severity": s.severity, "message": s.message, "fingerprint": fp,
+         "occurrences": 1, "created_at": now, "last_seen_at": now, "resolved": False}
+        for fp, s in by_fp.items()
+    ]
+    opened = 0
+    for i in range(0, len(rows), 500):
+        stmt = upsert(table).values(rows[i:i + 500])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.fingerprint],
+            index_where=open_only,
+            set_={
+                "occurrences": table.c.occurrences + 1,
+                "last_seen_at": stmt.excluded.last_seen_at,
+                "severity": stmt.excluded.severity,
+                "message": stmt.excluded.message,
+            },
+        ).returning(table.c.occurrences)
+        opened += sum(1 for (n,) in session.execute(stmt) if n == 1)
+    return {"opened": opened, "repeated": len(rows) - opened}
+
+
+def archive_resolved_alerts(session: Session, older_than_days: Optional[int] = None) -> int:
+    """Move resolved alerts last seen before the retention window to AlertArchive, and commit."""
+    days = settings.ALERT_RETENTION_DAYS if older_than_days is None else older_than_days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    stale = (Alert.resolved == True) & (func.coalesce(Alert.last_seen_at, Alert.created_at) < cutoff)  # noqa: E712
+    cols = [getattr(Alert, c) for c in ARCHIVE_COLUMNS]
+    session.execute(
+        insert(AlertArchive).from_select(list(ARCHIVE_COLUMNS), select(*cols).where(stale))
+    )
+    moved = session.execute(delete(Alert).where(stale)).rowcount or 0
+    session.commit()
+    if moved:
+        logger.info("archived %d resolved alerts older than %d days", moved, days)
+    return moved
@@ -1,10 +1,18 @@
-from typing import Iterable, List, Tuple
+import logging
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Tuple
+from ..core.config import settings
 from ..models import Transaction
 from .llm import get_openai
 
+logger = logging.getLogger(__name__)
+
 SYSTEM_PROMPT = (
     "Tu es un assistant financier qui assigne une catégorie métier à chaque transaction. "
-    "Retourne UNIQUEMENT la catégorie pour chaque ligne, une par ligne, sans autre texte."
+    "Retourne UNIQUEMENT une ligne `id|catégorie` par transaction, sans autre texte."
 )
 
 CATEGORIES = [
@@ -12,23 +20,118 @@ CATEGORIES = [
     "Abonnements", "Voyage", "Services", "Salaire", "Ventes", "Autres",
 ]
 
+_CATEGORY_LOOKUP = {c.lower(): c for c in CATEGORIES}
+_RESULT_LINE = re.compile(r"^\W*(\d+)\s*[|:;,\-]\s*(.+?)\s*$")
+_NOISE = re.compile(r"[\d\W_]+")
+
+
+def normalize_description(text: str | None) -> str:
+    """Description reduced to its words: case, digits, punctuation dropped."""
+    return " ".join(_NOISE.sub(" ", (text or "").lower()).split())
+
 
-def build_prompt(txs: Iterable[Transaction]) -> str:
+def _row_line(r: Dict) -> str:
+    return f"{r['id']}|{r['date']}|{r['amount']}|{r['direction']}|{r.get('description', '')}"
+
+
+def build_prompt(rows: Iterable[Dict]) -> str:
     lines = [
         "Colonnes: id | date | montant | direction | description",
     ]
-    for t in txs:
-        lines.append(f"{t.id}|{t.date}|{t.amount}|{t.direction}|{t.description}")
+    for r in rows:
+        lines.append(_row_line(r))
     lines.append("\nCatégories possibles: " + ", ".join(CATEGORIES))
-    lines.append("\nPour chaque transaction, renvoie UNIQUEMENT une catégorie parmi la liste ci-dessus.")
+    lines.append("\nPour chaque transaction, renvoie une ligne `id|catégorie` avec une catégorie de la liste ci-dessus.")
     return "\n".join(lines)
 
 
-def categorize_transactions(txs: List[Transaction]) -> List[Tuple[Transaction, str]]:
-    if not txs:
-        return []
+def build_chunks(rows: List[Dict], token_budget: int) -> List[List[Dict]]:
+    """Split rows so each prompt stays under roughly `token_budget` tokens (~4 chars/token)."""
+    chunks: List[List[Dict]] = []
+    current: List[Dict] = []
+    used = 0
+    for r in rows:
+        cost = len(_row_line(r)) // 4 + 1
+        if current and used + cost > token_budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(r)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def parse_id_categories(content: str) -> Dict[int, str]:
+    """`id|catégorie` lines to a mapping; unknown categories become "Autres"."""
+    out: Dict[int, str] = {}
+    for line in content.splitlines():
+        m = _RESULT_LINE.match(line.strip())
+        if m:
+            out[int(m.group(1))] = _CATEGORY_LOOKUP.get(m.group(2).strip(" .*`\"'").lower(), "Autres")
+    return out
+
+
+def _with_retry(fn: Callable[[], Dict[int, str]]) -> Dict[int, str]:
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception:  # noqa: BLE001
+            attempt += 1
+            if attempt > settings.LLM_MAX_RETRIES:
+                raise
+            time.sleep(settings.LLM_RETRY_BASE_SECONDS * 2 ** (attempt - 1) * (1 + random.random()))
+
+
+def run_pipeline(rows: List[Dict], complete: Callable[[List[Dict]], str]) -> Dict[int, str]:
+    """Categorize rows through an LLM, return {row id: category}.
+
+    Rows with the same normalized description and direction are sent once.
+    The unique rows get short synthetic ids, are split into token-budgeted
+    chunks and run concurrently (LLM_CONCURRENCY) with retry and backoff;
+    `complete(chunk)` returns the raw model answer for one chunk. Answers are
+    matched back by id, so a dropped or reordered line only loses that row:
+    rows without an answer are left out of the result (not guessed), for the
+    caller to leave uncategorized and retry later. A chunk still failing after
+    its retries only loses its own rows (the call fails if they all do).
+    """
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    reps: List[Dict] = []
+    for r in rows:
+        key = (normalize_description(r.get("description")), str(r["direction"]))
+        if key not in groups:
+            groups[key] = []
+            reps.append({**r, "id": len(reps)})
+        groups[key].append(r["id"])
+    chunks = build_chunks(reps, settings.CATEGORIZE_CHUNK_TOKENS)
+
+    def work(chunk: List[Dict]) -> Dict[int, str] | Exception:
+        try:
+            return _with_retry(lambda: parse_id_categories(complete(chunk)))
+        except Exception as e:  # noqa: BLE001
+            logger.warning("categorize chunk of %d rows failed after retries: %s", len(chunk), e)
+            return e
+
+    answers: Dict[int, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, settings.LLM_CONCURRENCY)) as pool:
+        parts = list(pool.map(work, chunks))
+    if parts and all(isinstance(p, Exception) for p in parts):
+        raise parts[-1]
+    for part in parts:
+        if not isinstance(part, Exception):
+            answers.update(part)
+    result: Dict[int, str] = {}
+    for rep_id, ids in enumerate(groups.values()):
+        if rep_id in answers:
+            for i in ids:
+                result[i] = answers[rep_id]
+    return result
+
+
+def openai_complete(chunk: List[Dict]) -> str:
     client = get_openai()
-    user_prompt = build_prompt(txs)
+    user_prompt = build_prompt(chunk)
     resp = client.chat.completions.create(
         model="gpt-4o-mini",
         messages=[
@@ -37,9 +140,16 @@ def categorize_transactions(txs: List[Transaction]) -> List[Tuple[Transaction, s
         ],
         temperature=0.1,
     )
-    content = resp.choices[0].message.content.strip()
-    cats = [line.strip() for line in content.splitlines() if line.strip()]
-    # align sizes; fallback to "Autres"
-    while len(cats) < len(txs):
-        cats.append("Autres")
-    return list(zip(txs, cats[: len(txs)]))
+    return resp.choices[0].message.content.strip()
+
+
+def categorize_transactions(txs: List[Transaction]) -> List[Tuple[Transaction, str]]:
+    """(transaction, category) for the transactions the LLM answered."""
+    if not txs:
+        return []
+    rows = [
+        {"id": t.id, "date": t.date, "amount": t.amount, "direction": t.direction, "description": t.description or ""}
+        for t in txs
+    ]
+    cats = run_pipeline(rows, openai_complete)
+    return [(t, cats[t.id]) for t in txs if t.id in cats]
@@ -0,0 +1,159 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import Session, select
+from ..core.config import settings
+from ..models import Account, Direction, MonthlyRollup
+
+# Smoothing parameter grids, searched for every series at once
+ALPHAS = np.linspace(0.05, 0.95, 19)
+BETAS = np.array([0.01, 0.05, 0.1, 0.2, 0.3])
+GAMMAS = np.array([0.01, 0.1, 0.3])
+SEASON = 12
+
+METHODS = ("ses", "holt", "seasonal")
+GROUPS = ("account", "category", "currency")
+
+
+def _naive(Y: np.ndarray, periods: int) -> np.ndarray:
+    last = Y[:, -1:] if Y.shape[1] else np.zeros((Y.shape[0], 1))
+    return np.repeat(last, periods, axis=1)
+
+
+def _ses(Y: np.ndarray, periods: int) -> np.ndarray:
+    n, t_len = Y.shape
+    a = ALPHAS[None, :]
+    level = np.repeat(Y[:, :1], len(ALPHAS), axis=1)
+    sse = np.zeros_like(level)
+    for t in range(1, t_len):
+        err = Y[:, t:t + 1] - level
+        sse += err ** 2
+        level = level + a * err
+    best = level[np.arange(n), sse.argmin(axis=1)]
+    return np.repeat(best[:, None], periods, axis=1)
+
+
+def _holt(Y: np.ndarray, periods: int) -> np.ndarray:
+    n, t_len = Y.shape
+    a, b = (g.ravel()[None, :] for g in np.meshgrid(ALPHAS, BETAS))
+    level = np.repeat(Y[:, :1], a.shape[1], axis=1)
+    trend = np.repeat(Y[:, 1:2] - Y[:, :1], a.shape[1], axis=1)
+    sse = np.zeros_like(level)
+    for t in range(1, t_len):
+        err = Y[:, t:t + 1] - (level + trend)
+        sse += err ** 2
+        level = level + trend + a * err
+        trend = trend + a * b * err
+    best = sse.argmin(axis=1)
+    rows = np.arange(n)
+    steps = np.arange(1, periods + 1)[None, :]
+    return level[rows, best][:, None] + steps * trend[rows, best][:, None]
+
+
+def _seasonal(Y: np.ndarray, periods: int) -> np.ndarray:
+    """Additive Holt-Winters (error-correction form) with a 12-month season."""
+    n, t_len = Y.shape
+    m = SEASON
+    a, b, g = (x.ravel()[None, :] for x in np.meshgrid(ALPHAS, BETAS, GAMMAS))
+    p = a.shape[1]
+    first = Y[:, :m].mean(axis=1, keepdims=True)
+    level = np.repeat(first, p, axis=1)
+    trend = np.repeat((Y[:, m:2 * m].mean(axis=1, keepdims=True) - first) / m, p, axis=1)
+    seas = np.repeat((Y[:, :m] - first)[:, None, :], p, axis=1)  # (n, p, m)
+    sse = np.zeros_like(level)
+    for t in range(m, t_len):
+        s = seas[:, :, t % m]
+        err = Y[:, t:t + 1] - (level + trend + s)
+        sse += err ** 2
+        level = level + trend + a * err
+        trend = trend + a * b * err
+        seas[:, :, t % m] = s + g * err
+    best = sse.argmin(axis=1)
+    rows = np.arange(n)
+    steps = np.arange(1, periods + 1)
+    phase = (t_len + steps - 1) % m
+    return (
+        level[rows, best][:, None]
+        + steps[None, :] * trend[rows, best][:, None]
+        + seas[rows, best][:, phase]
+    )
+
+
+def forecast_matrix(Y: np.ndarray, periods: int = 3, method: str = "ses") -> np.ndarray:
+    """Forecast every row of `Y` (series x months) in one vectorized pass.
+
+    Parameters are picked per series by grid search on one-step-ahead SSE.
+    Too-short series degrade to the next simpler method, down to repeating
+    the last value.
+    """
+    Y = np.asarray(Y, dtype=np.float64)
+    t_len = Y.shape[1]
+    if method == "seasonal" and t_len >= 2 * SEASON:
+        return _seasonal(Y, periods)
+    if method in ("holt", "seasonal") and t_len >= 3:
+        return _holt(Y, periods)
+    if t_len >= 3:
+        return _ses(Y, periods)
+    return _naive(Y, periods)
+
+
+def forecast_batch(Y: np.ndarray, periods: int = 3, method: str = "ses") -> np.ndarray:
+    """`forecast_matrix`, fanned out to a process pool for large batches."""
+    Y = np.asarray(Y, dtype=np.float64)
+    if len(Y) < settings.FORECAST_POOL_MIN_SERIES:
+        return forecast_matrix(Y, periods, method)
+    workers = settings.FORECAST_POOL_WORKERS or os.cpu_count() or 1
+    chunks = np.array_split(Y, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = pool.map(forecast_matrix, chunks, [periods] * len(chunks), [method] * len(chunks))
+        return np.vstack(list(parts))
+
+
+def grouped_series(session: Session, group_by: str) -> Tuple[List[str], List[Optional[object]], np.ndarray]:
+    """Aligned monthly net series per account, category or currency.
+
+    Returns (months, keys, matrix) where matrix[i] is the zero-filled net
+    series of keys[i]. Account and currency series are in native currency,
+    category series in base currency since a category spans accounts.
+    """
+    if group_by == "account":
+        key, amount = MonthlyRollup.account_id, MonthlyRollup.amount
+    elif group_by == "category":
+        key, amount = MonthlyRollup.category, MonthlyRollup.amount_base
+    else:
+        key, amount = func.coalesce(Account.currency, "EUR"), MonthlyRollup.amount
+    rows = session.exec(
+        select(key, MonthlyRollup.month, MonthlyRollup.direction, func.sum(amount))
+        .select_from(MonthlyRollup)
+        .outerjoin(Account, MonthlyRollup.account_id == Account.id)
+        .group_by(key, MonthlyRollup.month, MonthlyRollup.direction)
+    ).all()
+    if not rows:
+        return [], [], np.zeros((0, 0))
+    import pandas as pd  # heavy, loaded on first use
+
+    df = pd.DataFrame(rows, columns=["key", "month", "direction", "amount"])
+    income = np.asarray([Direction(d) == Direction.income for d in df["direction"]])
+    df["net"] = np.where(income, df["amount"], -df["amount"])
+    df["month"] = pd.PeriodIndex(df["month"], freq="M")
+    wide = df.groupby(["key", "month"], dropna=False)["net"].sum().unstack(fill_value=0.0)
+    months = pd.period_range(df["month"].min(), df["month"].max(), freq="M")
+    wide = wide.reindex(columns=months, fill_value=0.0)
+    keys = [None if pd.isna(k) else (int(k) if group_by == "account" else k) for k in wide.index]
+    return [str(m) for m in months], keys, wide.to_numpy(dtype=np.float64)
+
+
+def forecast_groups(session: Session, group_by: str, periods: int = 3, method: str = "ses") -> Dict:
+    months, keys, Y = grouped_series(session, group_by)
+    preds = forecast_batch(Y, periods, method) if len(keys) else np.zeros((0, periods))
+    return {
+        "group_by": group_by,
+        "method": method,
+        "months": months,
+        "series": [
+            {"key": k, "values": Y[i].tolist(), "forecast": preds[i].tolist()}
+            for i, k in enumerate(keys)
+        ],
+    }
@@ -1,19 +1,124 @@
+import threading
+import time
+from bisect import bisect_right
 from datetime import date
-from typing import Optional
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
 from sqlmodel import Session, select
 from ..models import ExchangeRate
 from ..core.config import settings
 
 
+class FxIndex:
+    """Process-wide in-memory index of exchange rates.
+
+    Per currency, keeps parallel sorted arrays of date ordinals and rates so a
+    lookup is a bisect instead of a query. Loaded lazily from the DB on first
+    use, dropped by `invalidate()` whenever rates are written, and reloaded
+    after `FX_INDEX_TTL_SECONDS` so other workers eventually see new rates.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._data: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None
+        self._loaded_at = 0.0
+        self._generation = 0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._data = None
+            self._generation += 1
+
+    def _load(self, session: Session) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        rows = session.exec(
+            select(ExchangeRate.currency, ExchangeRate.date, ExchangeRate.rate_to_base)
+            .order_by(ExchangeRate.currency, ExchangeRate.date, ExchangeRate.id)
+        ).all()
+        grouped: Dict[str, Tuple[List[int], List[float]]] = {}
+        for cur, d, rate in rows:
+            ords, rates = grouped.setdefault(cur, ([], []))
+            o = d.toordinal()
+            # Several rates on the same day: the last inserted one wins
+            if ords and ords[-1] == o:
+                rates[-1] = rate
+            else:
+                ords.append(o)
+                rates.append(rate)
+        return {
+            cur: (np.asarray(ords, dtype=np.int64), np.asarray(rates, dtype=np.float64))
+            for cur, (ords, rates) in grouped.items()
+        }
+
+    def snapshot(self, session: Session) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        data = self._data
+        if data is not None and time.monotonic() - self._loaded_at < settings.FX_INDEX_TTL_SECONDS:
+            return data
+        # Loaded outside the lock (async routes run this on the event loop thread, where
+        # waiting on a lock held across a query would deadlock); a concurrent reload is harmless
+        loaded_at, generation = time.monotonic(), self._generation
+        data = self._load(session)
+        with self._lock:
+            if generation == self._generation:  # not invalidated while loading
+                self._data, self._loaded_at = data, loaded_at
+        return data
+
+    def rate(self, session: Session, currency: str, on_date: Optional[date] = None) -> float:
+        entry = self.snapshot(session).get(currency)
+        if entry is None:
+            return 1.0  # fallback 1.0 for POC
+        ords, rates = entry
+        if on_date is None:
+            return float(rates[-1])
+        i = bisect_right(ords, on_date.toordinal())
+        return float(rates[i - 1]) if i else 1.0
+
+    def rates(self, session: Session, currency: str, ordinals: np.ndarray) -> np.ndarray:
+        """Vectorized lookup of the rate in force at each date ordinal."""
+        entry = self.snapshot(session).get(currency)
+        if entry is None:
+            return np.ones(len(ordinals), dtype=np.float64)
+        ords, rates = entry
+        idx = np.searchsorted(ords, ordinals, side="right") - 1
+        return np.where(idx >= 0, rates[np.clip(idx, 0, None)], 1.0)
+
+
+fx_index = FxIndex()
+
+
+def invalidate_rates() -> None:
+    fx_index.invalidate()
+
+
 def get_rate(session: Session, currency: str, on_date: Optional[date] = None) -> float:
     if currency == settings.BASE_CURRENCY:
         return 1.0
-    q = select(ExchangeRate).where(ExchangeRate.currency == currency)
-    if on_date:
-        q = q.where(ExchangeRate.date <= on_date).order_by(ExchangeRate.date.desc())
-    rate = session.exec(q).first()
-    return rate.rate_to_base if rate else 1.0  # fallback 1.0 for POC
+    return fx_index.rate(session, currency, on_date)
 
 
 def convert(session: Session, amount: float, currency: str, on_date: Optional[date] = None) -> float:
     return amount * get_rate(session, currency, on_date)
+
+
+def convert_many(
+    session: Session,
+    amounts: Sequence[float],
+    currencies: Sequence[str],
+    dates: Sequence[date],
+) -> np.ndarray:
+    """Convert a batch of amounts to base currency in one pass.
+
+    Rates are resolved per currency with a single `searchsorted` over all the
+    dates of that currency.
+    """
+    amts = np.asarray(amounts, dtype=np.float64)
+    if not len(amts):
+        return amts
+    curs = np.asarray(currencies, dtype=object)
+    ords = np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(amts))
+    out = amts.copy()
+    for cur in set(curs.tolist()):
+        if cur == settings.BASE_CURRENCY:
+            continue
+        mask = curs == cur
+        out[mask] = amts[mask] * fx_index.rates(session, cur, ords[mask])
+    return out
@@ -0,0 +1,165 @@
+import csv
+import os
+import uuid
+from datetime import date, datetime
+from typing import BinaryIO, Dict, Iterator, List, Optional
+from sqlalchemy import Column, MetaData, Table, delete, insert, literal, select
+from sqlmodel import Session
+from ..core.config import settings
+from ..models import Transaction, Direction
+from .rollup import apply_rows
+
+ERRORS_DIR = os.path.join("storage", "imports")
+MAX_ERRORS_INLINE = 20
+
+
+def _parse_row(row: Dict, account_id: Optional[int], now: datetime) -> Dict:
+    raw_amount = row.get("amount") or row.get("Amount")
+    if not raw_amount:
+        raise ValueError("missing amount")
+    amount = float(raw_amount)
+    raw_date = row.get("date") or row.get("Date")
+    if not raw_date:
+        raise ValueError("missing date")
+    return {
+        "account_id": account_id,
+        "date": date.fromisoformat(raw_date.strip()),
+        "amount": abs(amount),
+        "direction": Direction.expense if amount < 0 else Direction.income,
+        "category": row.get("category") or None,
+        "description": row.get("description") or row.get("Description"),
+        "status": "booked",
+        "invoice_id": None,
+        "created_at": now,
+    }
+
+
+INSERT_COLUMNS = ("account_id", "date", "amount", "direction", "category", "description", "status", "invoice_id", "created_at")
+# Same value on every row of an import (see _parse_row): bound once per batch when staging
+CONSTANT_COLUMNS = ("account_id", "status", "invoice_id", "created_at")
+# SQLite staging table for `_insert_staged`, created per connection (TEMP)
+_STAGE = Table(
+    "import_stage", MetaData(),
+    *(Column(c, Transaction.__table__.c[c].type) for c in INSERT_COLUMNS if c not in CONSTANT_COLUMNS),
+    schema="temp",
+)
+
+
+def _flush(session: Session, batch: List[Dict]) -> None:
+    """executemany INSERT of parsed rows, bypassing per-row ORM overhead.
+
+    Core `insert()` with a list of parameter dicts: SQLAlchemy caches the
+    compiled statement and applies the column types, the driver gets one
+    executemany (insertmanyvalues where supported).
+    """
+    conn = session.connection()
+    if conn.dialect.name == "sqlite":
+        _insert_staged(conn, batch)
+    else:
+        conn.execute(insert(Transaction.__table__), batch)
+    apply_rows(session, batch)
+    session.commit()
+
+
+def _insert_staged(conn, batch: List[Dict]) -> None:
+    """SQLite: executemany into a temp table, then one INSERT ... SELECT.
+
+    The search index is maintained by FTS5 triggers, and FTS5 flushes its
+    pending terms at the end of every statement: one statement per row
+    would write one index segment per row. Moving the batch in a single
+    statement indexes it in one go (about 2x faster imports). Only the
+    per-row columns go through the temp table; CONSTANT_COLUMNS are bound
+    once in the INSERT ... SELECT.
+    """
+    table = Transaction.__table__
+    if not conn.connection.dbapi_connection.in_transaction:
+        # Take the write lock first (waits up to busy_timeout): a deferred transaction
+        # upgrading to a writer once another connection has committed fails at once
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    cols = ", ".join(_STAGE.c.keys())
+    conn.exec_driver_sql(f'CREATE TEMP TABLE IF NOT EXISTS import_stage AS SELECT {cols} FROM "transaction" WHERE 0')
+    conn.execute(insert(_STAGE), batch)
+    constants = [literal(batch[0][c], table.c[c].type).label(c) for c in CONSTANT_COLUMNS]
+    conn.execute(insert(table).from_select([*_STAGE.c.keys(), *CONSTANT_COLUMNS], select(*_STAGE.c, *constants)))
+    conn.execute(delete(_STAGE))
+
+
+def _lines(stream: BinaryIO, report: "_ErrorReport") -> Iterator[str]:
+    """Decode the upload line by line as strict UTF-8.
+
+    A line that does not decode is recorded in the error report and replaced
+    by an empty line, which the CSV reader skips while keeping its line count.
+    """
+    for number, raw in enumerate(stream, 1):
+        try:
+            yield raw.decode("utf-8")
+        except UnicodeDecodeError as e:
+            report.add(number, f"invalid UTF-8 at byte {e.start}")
+            yield "\n"
+
+
+class _ErrorReport:
+    """Failed rows, written to a CSV under storage/imports as they occur."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.sample: List[Dict] = []
+        self.name: Optional[str] = None
+        self._fh = None
+        self._writer = None
+
+    def add(self, line: int, reason: str) -> None:
+        self.count += 1
+        if len(self.sample) < MAX_ERRORS_INLINE:
+            self.sample.append({"line": line, "reason": reason})
+        if self._writer is None:
+            os.makedirs(ERRORS_DIR, exist_ok=True)
+            self.name = f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}_errors.csv"
+            self._fh = open(os.path.join(ERRORS_DIR, self.name), "w", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._fh)
+            self._writer.writerow(["line", "reason"])
+        self._writer.writerow([line, reason])
+
+    def close(self) -> None:
+        if self._fh:
+            self._fh.close()
+
+
+def import_transactions_csv(
+    session: Session,
+    stream: BinaryIO,
+    account_id: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> Dict:
+    """Stream a bank CSV export into the Transaction table.
+
+    The upload is decoded incrementally as strict UTF-8 and validated row by
+    row; valid rows are written with one executemany INSERT per batch,
+    together with their rollup deltas, and committed so a failure late in a
+    huge file keeps the batches already written. Failed rows, and lines that
+    are not valid UTF-8, go to an error file (line number and reason) whose
+    name is returned with the counts.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_ROWS
+    report = _ErrorReport()
+    reader = csv.DictReader(_lines(stream, report))
+    now = datetime.utcnow()
+    batch: List[Dict] = []
+    imported = 0
+    try:
+        for row in reader:
+            try:
+                batch.append(_parse_row(row, account_id, now))
+            except (ValueError, TypeError, AttributeError) as e:
+                report.add(reader.line_num, str(e) or e.__class__.__name__)
+                continue
+            if len(batch) >= batch_size:
+                _flush(session, batch)
+                imported += len(batch)
+                batch = []
+        if batch:
+            _flush(session, batch)
+            imported += len(batch)
+    finally:
+        report.close()
+    return {"imported": imported, "failed": report.count, "errors": report.sample, "errors_file": report.name}
@@ -0,0 +1,181 @@
+"""Invoice OCR jobs.
+
+POST /invoices/ocr stores the PDF, records a `Job` and returns; the job then
+runs on the job executor: the PDF text is extracted in a process pool (CPU
+bound, out of the GIL), stopping once the PARSE_MAX_CHARS the parser reads
+are collected, then `parse_invoice_text` calls the LLM from the job thread
+and the invoice is created and linked to the document.
+
+Jobs are claimed with a conditional UPDATE (queued -> running), so a job
+runs once even when several workers resume the same table. Jobs cut short
+by a shutdown go back to queued; queued jobs, and running ones older than
+OCR_JOB_STALE_MINUTES (a crashed process), are resubmitted at startup
+(`resume_jobs`). A failed job is not retried: re-uploading the PDF queues a
+new one. Its exception is logged; clients only get JOB_ERROR.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import update
+from sqlmodel import Session, select
+from ..core.config import settings
+from ..db import engine
+from ..models import Document, Invoice, InvoiceType, Job
+from .ocr import PARSE_MAX_CHARS, extract_text_from_pdf, parse_invoice_text
+
+logger = logging.getLogger(__name__)
+
+INVOICE_OCR = "invoice_ocr"
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+# Returned to clients for a failed job; the exception itself only goes to the log
+JOB_ERROR = "Échec du traitement OCR de la facture"
+
+_executor = ThreadPoolExecutor(max_workers=max(1, settings.OCR_JOB_WORKERS), thread_name_prefix="ocr-job")
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_stopping = threading.Event()
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the web process has threads (executors, DB pool) a fork would copy mid-flight
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.OCR_PROCESS_WORKERS or os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def job_status(job: Job) -> Dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "document_id": job.document_id,
+        "invoice_id": job.invoice_id,
+        "error": JOB_ERROR if job.status == FAILED else None,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _invoice(data: Dict, file_path: str) -> Invoice:
+    return Invoice(
+        type=InvoiceType.payable,
+        due_date=datetime.strptime(data.get("due_date"), "%Y-%m-%d").date() if data.get("due_date") else datetime.utcnow().date(),
+        amount=float(data.get("amount") or 0.0),
+        currency=(data.get("currency") or "EUR").upper(),
+        counterparty=data.get("counterparty") or None,
+        status="open",
+        file_path=file_path,
+    )
+
+
+def _held(job_id: int, claimed_at: datetime):
+    # The claim's started_at is its token: a job requeued as stale and claimed again is no longer ours
+    return (Job.id == job_id, Job.status == RUNNING, Job.started_at == claimed_at)
+
+
+def _finish(session: Session, job_id: int, claimed_at: datetime, status: str, invoice_id: Optional[int] = None,
+            error: Optional[str] = None) -> bool:
+    """Record the outcome of a job this worker still holds; False when it does not."""
+    return session.exec(
+        update(Job).where(*_held(job_id, claimed_at))
+        .values(status=status, invoice_id=invoice_id, error=error, finished_at=datetime.utcnow())
+    ).rowcount > 0
+
+
+def _run(job_id: int) -> None:
+    # Everything after submission runs under the try, claim included: any
+    # error marks the job failed instead of leaving it running
+    claimed_at: Optional[datetime] = None
+    try:
+        with Session(engine) as session:
+            now = datetime.utcnow()
+            claimed = session.exec(
+                update(Job).where(Job.id == job_id, Job.status == QUEUED)
+                .values(status=RUNNING, started_at=now, attempts=Job.attempts + 1)
+            ).rowcount
+            session.commit()
+            if not claimed:
+                return
+            claimed_at = now
+            doc = session.get(Document, session.get(Job, job_id).document_id)
+            if doc is None:
+                raise LookupError("Document introuvable")
+            if doc.invoice_id is not None:
+                _finish(session, job_id, claimed_at, DONE, invoice_id=doc.invoice_id)
+                session.commit()
+                return
+            doc_id, path = doc.id, doc.stored_path
+        text = _process_pool().submit(extract_text_from_pdf, path, PARSE_MAX_CHARS).result()
+        data = parse_invoice_text(text)
+        with Session(engine) as session:
+            inv = _invoice(data, path)
+            session.add(inv)
+            session.flush()
+            session.exec(update(Document).where(Document.id == doc_id).values(invoice_id=inv.id, type="invoice"))
+            if not _finish(session, job_id, claimed_at, DONE, invoice_id=inv.id):
+                session.rollback()  # requeued as stale and taken over: the other run creates the invoice
+                return
+            session.commit()
+    except Exception:  # noqa: BLE001
+        with Session(engine) as session:
+            # Only a job this worker holds (or, when the claim itself failed, one still queued) is touched
+            held = _held(job_id, claimed_at) if claimed_at else (Job.id == job_id, Job.status == QUEUED)
+            if _stopping.is_set():
+                if claimed_at:
+                    session.exec(update(Job).where(*held).values(status=QUEUED, started_at=None))
+                    session.commit()
+                return
+            logger.exception("invoice OCR job %s failed", job_id)
+            session.exec(update(Job).where(*held).values(status=FAILED, error=JOB_ERROR, finished_at=datetime.utcnow()))
+            session.commit()
+
+
+def submit_invoice_ocr(session: Session, doc: Document) -> Job:
+    """Job turning a stored PDF into an invoice.
+
+    A document already linked to an invoice gets a job that is done at once;
+    one with a job queued or running gets that job back.
+    """
+    active = session.exec(
+        select(Job).where(Job.document_id == doc.id, Job.status.in_([QUEUED, RUNNING])).order_by(Job.id.desc())
+    ).first()
+    if active is not None:
+        return active
+    job = Job(kind=INVOICE_OCR, document_id=doc.id)
+    if doc.invoice_id is not None:
+        job.status, job.invoice_id, job.finished_at = DONE, doc.invoice_id, datetime.utcnow()
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    if job.status == QUEUED:
+        _executor.submit(_run, job.id)
+    return job
+
+
+def resume_jobs() -> int:
+    """Resubmit the queued jobs and requeue stale running ones; returns how many."""
+    stale = datetime.utcnow() - timedelta(minutes=settings.OCR_JOB_STALE_MINUTES)
+    with Session(engine) as session:
+        session.exec(update(Job).where(Job.status == RUNNING, Job.started_at < stale).values(status=QUEUED, started_at=None))
+        session.commit()
+        ids = session.exec(select(Job.id).where(Job.status == QUEUED).order_by(Job.id)).all()
+    for job_id in ids:
+        _executor.submit(_run, job_id)
+    return len(ids)
+
+
+def shutdown_jobs() -> None:
+    """Stop taking jobs; queued ones stay queued in the table for the next start."""
+    _stopping.set()
+    _executor.shutdown(wait=False, cancel_futures=True)
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
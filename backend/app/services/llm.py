@@ -1,12 +1,152 @@
-from openai import OpenAI
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Optional
 from ..core.config import settings
 
-_client: OpenAI | None = None
+if TYPE_CHECKING:  # the openai package is imported on first use
+    from openai import OpenAI
 
-def get_openai() -> OpenAI:
+_client: Optional["OpenAI"] = None
+
+
+class LLMCache:
+    """Content-addressed store of chat completions in a local SQLite file.
+
+    Keys are the SHA-256 of the request (model, messages, temperature and any
+    other parameter). Entries expire after `ttl` seconds; past `max_bytes`
+    the least recently used ones are evicted.
+    """
+
+    EVICT_EVERY = 50  # puts between two eviction passes
+
+    def __init__(self, path: str, ttl: float, max_bytes: int) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed ON llm_cache (accessed_at)")
+        return self._conn
+
+    @staticmethod
+    def key(params: dict) -> str:
+        blob = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl:
+                db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return row[0]
+            if row:
+                db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._puts += 1
+            if self._puts % self.EVICT_EVERY == 0:
+                self._evict(db, now)
+
+    def _evict(self, db: sqlite3.Connection, now: float) -> None:
+        db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in db.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        db.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._db().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+llm_cache = LLMCache(
+    settings.LLM_CACHE_PATH,
+    ttl=settings.LLM_CACHE_TTL_SECONDS,
+    max_bytes=int(settings.LLM_CACHE_MAX_MB * 1024 * 1024),
+)
+
+
+class _CachedCompletions:
+    def __init__(self, inner: Any, cache: LLMCache) -> None:
+        self._inner = inner
+        self._cache = cache
+
+    def create(self, *, cache_bypass: bool = False, **params: Any) -> Any:
+        """`chat.completions.create`, answered from the cache when possible.
+
+        Streaming calls, `cache_bypass=True` and LLM_CACHE_ENABLED=false go
+        straight to the API.
+        """
+        if cache_bypass or params.get("stream") or not settings.LLM_CACHE_ENABLED:
+            return self._inner.create(**params)
+        key = self._cache.key(params)
+        hit = self._cache.get(key)
+        if hit is not None:
+            from openai.types.chat import ChatCompletion
+
+            return ChatCompletion.model_validate_json(hit)
+        resp = self._inner.create(**params)
+        self._cache.put(key, resp.model_dump_json())
+        return resp
+
+
+class CachedOpenAI:
+    """OpenAI client whose chat completions go through `llm_cache`."""
+
+    def __init__(self, client: "OpenAI", cache: LLMCache) -> None:
+        self._client = client
+        self.chat = SimpleNamespace(completions=_CachedCompletions(client.chat.completions, cache))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+def get_openai() -> "OpenAI":
     global _client
     if _client is None:
         if not settings.OPENAI_API_KEY:
             raise RuntimeError("OPENAI_API_KEY non configurée. Ajoutez-la dans .env")
-        _client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        from openai import OpenAI
+
+        _client = CachedOpenAI(OpenAI(api_key=settings.OPENAI_API_KEY), llm_cache)
     return _client
@@ -0,0 +1,212 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+import joblib
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sqlalchemy import func
+from sqlmodel import Session, select
+from ..core.config import settings
+from ..models import Transaction, Direction
+from .categorizer import CATEGORIES
+
+try:
+    import fcntl
+except ImportError:  # Windows: the file lock only serializes the threads of one process
+    fcntl = None
+
+MODEL_PATH = os.path.join("storage", "models", "categorizer.joblib")
+TRAIN_CHUNK = 10_000
+
+
+class LocalCategorizer:
+    """Linear model over hashed description n-grams plus amount/direction.
+
+    The hashing vectorizer is stateless, so the SGD model can be updated with
+    `partial_fit` as new labels arrive (history, entries and imports past
+    `last_tx_id`, LLM answers) without refitting a vocabulary. Classes are
+    fixed to `categorizer.CATEGORIES`.
+    """
+
+    def __init__(self) -> None:
+        self.vectorizer = HashingVectorizer(
+            analyzer="char_wb", ngram_range=(2, 4), n_features=2 ** 18,
+            alternate_sign=False, norm="l2", lowercase=True,
+        )
+        self.model = SGDClassifier(loss="log_loss", alpha=1e-5, random_state=0)
+        self.classes = np.array(CATEGORIES)
+        self.n_seen = 0
+        self.last_tx_id = 0  # labelled transactions up to this id have been learned
+
+    def features(self, rows: Sequence[Dict]) -> sparse.csr_matrix:
+        text = self.vectorizer.transform([r.get("description") or "" for r in rows])
+        amount = np.log1p(np.abs(np.fromiter((float(r["amount"] or 0) for r in rows), dtype=np.float64, count=len(rows))))
+        income = np.fromiter((r["direction"] in (Direction.income, "income") for r in rows), dtype=np.float64, count=len(rows))
+        return sparse.hstack([text, sparse.csr_matrix(np.column_stack([amount / 10.0, income]))], format="csr")
+
+    @property
+    def ready(self) -> bool:
+        return self.n_seen >= settings.LOCAL_CATEGORIZER_MIN_TRAINING_ROWS
+
+    def learn(self, rows: Sequence[Dict], labels: Sequence[str]) -> int:
+        keep = [i for i, c in enumerate(labels) if c in CATEGORIES]
+        if not keep:
+            return 0
+        X = self.features([rows[i] for i in keep])
+        self.model.partial_fit(X, [labels[i] for i in keep], classes=self.classes)
+        self.n_seen += len(keep)
+        return len(keep)
+
+    def predict(self, rows: Sequence[Dict]) -> List[Tuple[str, float]]:
+        if not rows or not self.ready:
+            return [("", 0.0)] * len(rows)
+        proba = self.model.predict_proba(self.features(rows))
+        best = proba.argmax(axis=1)
+        return list(zip(self.model.classes_[best].tolist(), proba[np.arange(len(rows)), best].tolist()))
+
+
+_lock = threading.Lock()
+_model: Optional[LocalCategorizer] = None
+_stamp: Optional[Tuple[int, int]] = None  # (mtime_ns, inode) of the file `_model` was loaded from or saved to
+
+
+def _file_stamp() -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(MODEL_PATH)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_ino
+
+
+@contextmanager
+def _file_lock():
+    """Serialize model file writes across worker processes (POSIX; threads only elsewhere)."""
+    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
+    with open(MODEL_PATH + ".lock", "a") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _save(model: LocalCategorizer) -> None:
+    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
+    tmp = MODEL_PATH + ".tmp"
+    joblib.dump(model, tmp)
+    os.replace(tmp, MODEL_PATH)
+
+
+def _tx_row(t) -> Dict:
+    return {"description": t.description, "amount": t.amount, "direction": t.direction}
+
+
+def _learn_labelled(session: Session, model: LocalCategorizer, until_id: int) -> int:
+    """partial_fit on transactions labelled with a known category, ids in (last_tx_id, until_id]."""
+    learned = 0
+    while True:
+        batch = session.exec(
+            select(Transaction.id, Transaction.description, Transaction.amount, Transaction.direction, Transaction.category)
+            .where(Transaction.category.in_(CATEGORIES), Transaction.id > model.last_tx_id, Transaction.id <= until_id)
+            .order_by(Transaction.id)
+            .limit(TRAIN_CHUNK)
+        ).all()
+        if not batch:
+            break
+        learned += model.learn([_tx_row(t) for t in batch], [t.category for t in batch])
+        model.last_tx_id = batch[-1].id
+    model.last_tx_id = until_id
+    return learned
+
+
+def _max_tx_id(session: Session) -> int:
+    return session.exec(select(func.max(Transaction.id))).one() or 0
+
+
+def _fit_history(session: Session) -> LocalCategorizer:
+    model = LocalCategorizer()
+    _learn_labelled(session, model, _max_tx_id(session))
+    return model
+
+
+def train_from_history(session: Session) -> LocalCategorizer:
+    """Fit a fresh model on every transaction already labelled with a known category."""
+    model = _fit_history(session)
+    with _file_lock():
+        _save(model)
+    return model
+
+
+def _current(session: Session) -> LocalCategorizer:
+    """The model as last written by any worker (caller holds `_lock` and the file lock)."""
+    global _model, _stamp
+    stamp = _file_stamp()
+    if stamp is None:
+        _model = _fit_history(session)
+        _save(_model)
+        _stamp = _file_stamp()
+    elif _model is None or stamp != _stamp:
+        _model, _stamp = joblib.load(MODEL_PATH), stamp
+        if not hasattr(_model, "last_tx_id"):  # saved before the watermark existed: history already learned
+            _model.last_tx_id = _max_tx_id(session)
+    return _model
+
+
+def _update(session: Session, rows: Sequence[Dict] = (), labels: Sequence[str] = ()) -> LocalCategorizer:
+    """Reload the latest model, learn the labels written since its watermark (and the given ones), save.
+
+    Runs under the file lock, so workers update the model one after the other
+    instead of overwriting each other's copy.
+    """
+    global _stamp
+    with _lock, _file_lock():
+        model = _current(session)
+        watermark = model.last_tx_id
+        learned = _learn_labelled(session, model, max(watermark, _max_tx_id(session)))
+        if rows:
+            learned += model.learn(rows, labels)
+        if learned or model.last_tx_id != watermark:
+            _save(model)
+            _stamp = _file_stamp()
+        return model
+
+
+def get_model(session: Session) -> LocalCategorizer:
+    """Process-wide model: loaded from disk (again once another worker saved it), or trained from history."""
+    with _lock:
+        if _model is not None and _file_stamp() == _stamp:
+            return _model
+        with _file_lock():
+            return _current(session)
+
+
+def learn(session: Session, rows: Sequence[Dict], labels: Sequence[str]) -> None:
+    """Incrementally train on new labels and persist the model."""
+    _update(session, rows, labels)
+
+
+def predict_confident(session: Session, rows: Sequence[Dict]) -> List[Optional[str]]:
+    """Category per row, or None where the local model is not confident enough.
+
+    Labels written since the model's watermark (manual entries, imports) are
+    learned first. Prediction holds `_lock`, so a concurrent `partial_fit`
+    never changes the coefficients mid-read.
+    """
+    threshold = settings.LOCAL_CATEGORIZER_MIN_CONFIDENCE
+    model = _update(session)
+    with _lock:
+        predictions = model.predict(rows)
+    return [cat if conf >= threshold else None for cat, conf in predictions]
+
+
+if __name__ == "__main__":
+    from ..db import engine, init_db
+
+    init_db()
+    with Session(engine) as s:
+        print(f"local categorizer trained on {train_from_history(s).n_seen} transactions")
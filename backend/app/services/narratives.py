@@ -0,0 +1,80 @@
+import json
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from typing import Dict, Optional, Tuple
+from sqlmodel import Session
+from ..core.config import settings
+from ..db import engine
+from .snapshots import load_report, save_report
+
+logger = logging.getLogger(__name__)
+
+PENDING, READY, FAILED = "pending", "ready", "failed"
+# Returned to clients for a failed job; the exception itself only goes to the log
+NARRATIVE_ERROR = "Échec de la génération de la synthèse"
+
+_executor = ThreadPoolExecutor(max_workers=max(1, settings.NARRATIVE_WORKERS), thread_name_prefix="narrative")
+_jobs: Dict[Tuple[date, date], Optional[Future]] = {}  # None while the job is being queued
+_lock = threading.Lock()
+
+
+def _figures(income: float, expense: float, net: float) -> Dict:
+    return {"income": round(float(income or 0), 2), "expense": round(float(expense or 0), 2), "net": round(float(net or 0), 2)}
+
+
+def get_narrative(session: Session, start: date, end: date) -> Optional[Dict]:
+    """Stored monthly report content (figures, narrative, narrative_status), if any."""
+    report = load_report(session, start, end)
+    return json.loads(report.content_json) if report else None
+
+
+def _generate(start: date, end: date, figures: Dict) -> None:
+    from ..agents.crew import summarize_with_crew
+
+    payload = {**figures, "year": start.year, "month": start.month}
+    try:
+        content = {**figures, "narrative": summarize_with_crew(payload), "narrative_status": READY, "error": None}
+    except Exception:  # noqa: BLE001
+        logger.exception("narrative %s failed", start.isoformat())
+        content = {**figures, "narrative": None, "narrative_status": FAILED, "error": NARRATIVE_ERROR}
+    try:
+        with Session(engine) as session:
+            save_report(session, start, end, content)
+    finally:
+        with _lock:
+            _jobs.pop((start, end), None)
+
+
+def request_narrative(session: Session, start: date, end: date, income: float, expense: float, net: float) -> Dict:
+    """Narrative for a month, generated in the background when missing.
+
+    A narrative stored for the same figures is returned as is. Otherwise one
+    job per period is queued on the narrative executor (concurrent requests
+    for the period share it) and the caller gets `narrative_status="pending"`;
+    the text lands in the period's Report snapshot when the job finishes. Failed
+    narratives are retried on the next request.
+    """
+    figures = _figures(income, expense, net)
+    key = (start, end)
+    stored = get_narrative(session, start, end)
+    if stored and stored.get("narrative_status") == READY and all(stored.get(k) == v for k, v in figures.items()):
+        return {"narrative_status": READY, "narrative": stored.get("narrative")}
+    # The lock only claims the period: no database I/O under it (async routes
+    # run this on the event loop thread, where blocking on it would deadlock)
+    with _lock:
+        if key in _jobs:
+            return {"narrative_status": PENDING, "narrative": None}
+        _jobs[key] = None
+    try:
+        save_report(session, start, end, {**figures, "narrative": None, "narrative_status": PENDING, "error": None})
+        future = _executor.submit(_generate, start, end, figures)
+    except Exception:
+        with _lock:
+            _jobs.pop(key, None)
+        raise
+    with _lock:
+        if key in _jobs:
+            _jobs[key] = future
+    return {"narrative_status": PENDING, "narrative": None}
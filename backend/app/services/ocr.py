@@ -1,13 +1,26 @@
-import pdfplumber
+from typing import BinaryIO, Optional, Union
 from fastapi import UploadFile
 from .llm import get_openai
 
+PARSE_MAX_CHARS = 4000  # invoice text sent to the LLM
 
-def extract_text_from_pdf(file: UploadFile) -> str:
-    with pdfplumber.open(file.file) as pdf:
-        texts = []
+
+def extract_text_from_pdf(source: Union[UploadFile, BinaryIO, str], max_chars: Optional[int] = None) -> str:
+    """Text of the pages, in order; `source` is an upload, a binary file or a path (e.g. a stored blob).
+
+    With `max_chars`, stops at the first page that brings the text to that
+    length: the rest of a long scan is never parsed.
+    """
+    import pdfplumber  # heavy, loaded on first use
+
+    with pdfplumber.open(getattr(source, "file", source)) as pdf:
+        texts, size = [], 0
         for page in pdf.pages:
             texts.append(page.extract_text() or "")
+            page.close()
+            size += len(texts[-1]) + 1
+            if max_chars is not None and size >= max_chars:
+                break
     return "\n".join(texts)
 
 
@@ -15,7 +28,7 @@ def parse_invoice_text(text: str) -> dict:
     client = get_openai()
     prompt = (
         "Extrait les champs d'une facture (counterparty, amount, currency, due_date YYYY-MM-DD). "
-        "Réponds en JSON compact.\n\n" + text[:4000]
+        "Réponds en JSON compact.\n\n" + text[:PARSE_MAX_CHARS]
     )
     resp = client.chat.completions.create(
         model="gpt-4o-mini",
@@ -1,9 +1,20 @@
-from typing import List, Dict
-from datetime import datetime
+import csv
+import io
+import json
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import insert
 from sqlmodel import Session, select
-from rapidfuzz import fuzz
+from ..core.config import settings
 from ..models import Transaction, ReconciliationMatch
 
+MATCH_THRESHOLD = 60.0
+AMOUNT_BONUS = 50.0
+BLOCK_ROWS = 64  # bank rows scored per cdist call
+TOP_K = 5  # candidates kept per bank row for the assignment
+TIE_EPSILON = 1e-3  # below any real score difference, only reorders equal scores
+
 
 def parse_bank_rows(rows: List[Dict]) -> List[Dict]:
     # Expected keys: date (YYYY-MM-DD), amount (float), description (str), ref (str optional)
@@ -21,31 +32,196 @@ def parse_bank_rows(rows: List[Dict]) -> List[Dict]:
     return parsed
 
 
-def match_rows(session: Session, rows: List[Dict]) -> List[ReconciliationMatch]:
-    matches: List[ReconciliationMatch] = []
-    for r in rows:
-        # candidate transactions by date window +/- 2 days and amount tolerance 0.01
-        cands = session.exec(
-            select(Transaction).where(
-                Transaction.date >= r["date"],
-                Transaction.date <= r["date"],
+def _cents(values) -> np.ndarray:
+    return np.rint(np.abs(np.asarray(values, dtype=np.float64)) * 100).astype(np.int64)
+
+
+def _iter_json_array(text: io.TextIOBase, read_size: int = 1 << 16) -> Iterator[Dict]:
+    """Yield the items of a top-level JSON array without loading it whole."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def more() -> bool:
+        nonlocal buf, pos, eof
+        chunk = text.read(read_size)
+        eof = not chunk
+        buf, pos = buf[pos:] + chunk, 0
+        return not eof
+
+    def peek(skip: str) -> str:
+        # next significant char after whitespace and `skip`, "" at end of input
+        nonlocal pos
+        while True:
+            while pos < len(buf) and (buf[pos].isspace() or buf[pos] in skip):
+                pos += 1
+            if pos < len(buf) or not more():
+                return buf[pos] if pos < len(buf) else ""
+
+    if peek("") != "[":
+        raise ValueError("expected a JSON array")
+    pos += 1
+    while True:
+        c = peek(",")
+        if c == "]":
+            return
+        if not c:
+            raise ValueError("truncated JSON array")
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if eof:
+                    raise
+                more()
+                continue
+            # a value touching the end of the buffer may continue in the next read
+            if end == len(buf) and not eof:
+                more()
+                continue
+            break
+        yield obj
+        pos = end
+
+
+def iter_statement_chunks(stream: BinaryIO, filename: str, size: int) -> Iterator[List[Dict]]:
+    """Parse a CSV or JSON bank statement incrementally into chunks of parsed rows."""
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if filename.endswith(".csv"):
+        raw: Iterator[Dict] = csv.DictReader(text)
+    elif filename.endswith(".json"):
+        raw = _iter_json_array(text)
+    else:
+        raise ValueError("format non supporté (csv,json)")
+    chunk: List[Dict] = []
+    for r in raw:
+        chunk.append(r)
+        if len(chunk) >= size:
+            yield parse_bank_rows(chunk)
+            chunk = []
+    if chunk:
+        yield parse_bank_rows(chunk)
+    text.detach()
+
+
+def score_rows(session: Session, rows: List[Dict], taken_ids: Optional[Set[int]] = None) -> tuple[np.ndarray, np.ndarray]:
+    """Assign each bank row at most one transaction, one-to-one.
+
+    Candidates are loaded in one query over the statement's date range widened
+    by RECON_DATE_WINDOW_DAYS and kept sorted by date, so each block of
+    date-sorted bank rows only scores the slice of candidates in its window.
+    Descriptions are scored in bulk with `process.cdist`; an amount equal to
+    the cent adds AMOUNT_BONUS. The best TOP_K pairs per row then go through
+    a greedy highest-score-first assignment across the whole statement; rows
+    left without a transaction because all of their pairs were claimed are
+    scored again against the still free candidates, with K doubled, until
+    no such row is left.
+
+    Transactions in `taken_ids` (claimed by earlier chunks of the same
+    statement) are skipped, and the ones assigned here are added to it.
+
+    Returns (transaction ids or -1, scores) aligned with `rows`.
+    """
+    n = len(rows)
+    window = settings.RECON_DATE_WINDOW_DAYS
+    r_ord = np.fromiter((r["date"].toordinal() for r in rows), dtype=np.int64, count=n)
+    r_cents = _cents([r["amount"] for r in rows])
+    r_desc = [(r.get("description") or "").lower() for r in rows]
+    best_score = np.full(n, -1.0)
+    assigned = np.full(n, -1, dtype=np.int64)
+    if not n:
+        return assigned, best_score
+
+    cands = session.exec(
+        select(Transaction.id, Transaction.date, Transaction.amount, Transaction.description)
+        .where(
+            Transaction.date >= rows[int(r_ord.argmin())]["date"] - timedelta(days=window),
+            Transaction.date <= rows[int(r_ord.argmax())]["date"] + timedelta(days=window),
+        )
+        .order_by(Transaction.date, Transaction.id)
+    ).all()
+    if not cands:
+        return assigned, best_score
+    c_ids = np.fromiter((c[0] for c in cands), dtype=np.int64, count=len(cands))
+    c_ord = np.fromiter((c[1].toordinal() for c in cands), dtype=np.int64, count=len(cands))
+    c_cents = _cents([c[2] for c in cands])
+    c_desc = [(c[3] or "").lower() for c in cands]
+
+    from rapidfuzz.fuzz import partial_ratio
+    from rapidfuzz.process import cdist
+
+    taken = taken_ids if taken_ids is not None else set()
+    pending = np.argsort(r_ord, kind="stable")
+    k, first = TOP_K, True
+    while pending.size:
+        taken_arr = np.fromiter(taken, dtype=np.int64, count=len(taken))
+        pairs: List[tuple] = []
+        for start in range(0, len(pending), BLOCK_ROWS):
+            block = pending[start:start + BLOCK_ROWS]
+            lo = int(np.searchsorted(c_ord, r_ord[block[0]] - window, side="left"))
+            hi = int(np.searchsorted(c_ord, r_ord[block[-1]] + window, side="right"))
+            if lo >= hi:
+                continue
+            desc = cdist(
+                [r_desc[i] for i in block], c_desc[lo:hi],
+                scorer=partial_ratio, dtype=np.float32, workers=settings.RECON_WORKERS,
             )
-        ).all()
-        # In a real impl, widen date range and include direction logic
-        best = None
-        best_score = -1.0
-        for t in cands:
-            amt_ok = abs(t.amount - abs(r["amount"])) <= 0.01
-            desc_score = fuzz.partial_ratio((t.description or "").lower(), r["description"].lower())
-            score = desc_score + (50 if amt_ok else 0)
-            if score > best_score:
-                best = t
-                best_score = score
-        status = "matched" if best and best_score >= 60 else "unmatched"
-        m = ReconciliationMatch(bank_ref=r.get("ref") or r.get("description", ""), transaction_id=(best.id if best and status=="matched" else None), status=status, notes=f"score={best_score}")
-        session.add(m)
-        matches.append(m)
-    session.commit()
-    for m in matches:
-        session.refresh(m)
-    return matches
+            in_window = np.abs(r_ord[block, None] - c_ord[None, lo:hi]) <= window
+            amt_ok = np.abs(r_cents[block, None] - c_cents[None, lo:hi]) <= 1
+            score = np.where(in_window, desc + AMOUNT_BONUS * amt_ok, -1.0)
+            if first:
+                best_score[block] = score.max(axis=1)
+            score[:, np.isin(c_ids[lo:hi], taken_arr)] = -1.0
+            kk = min(k, hi - lo)
+            # Ties are broken by a rotation that depends on the row, so identical
+            # rows (recurring lines) pick different candidates among equal scores
+            m = hi - lo
+            rot = (np.arange(m)[None, :] - (start + np.arange(len(block)))[:, None] * kk) % m
+            top = np.argpartition(-(score - rot * (TIE_EPSILON / m)), kk - 1, axis=1)[:, :kk]
+            for bi, i in enumerate(block):
+                for j in top[bi]:
+                    s = float(score[bi, j])
+                    if s >= MATCH_THRESHOLD:
+                        pairs.append((-s, int(i), lo + int(j)))
+
+        pairs.sort()
+        for neg_s, i, j in pairs:
+            tx_id = int(c_ids[j])
+            if assigned[i] != -1 or tx_id in taken:
+                continue
+            assigned[i] = tx_id
+            best_score[i] = -neg_s
+            taken.add(tx_id)
+        # Rows whose candidates were all claimed by better pairs (recurring identical
+        # lines share the same top K) go round again with free candidates and a wider K
+        pending = np.unique(np.array([i for _, i, _ in pairs if assigned[i] == -1], dtype=np.int64))
+        pending = pending[np.argsort(r_ord[pending], kind="stable")]
+        k, first = k * 2, False
+    return assigned, best_score
+
+
+def ingest_statement(session: Session, chunks: Iterator[List[Dict]]) -> Iterator[Dict]:
+    """Match and store a statement chunk by chunk, yielding running totals.
+
+    Matches are bulk-inserted with one executemany per chunk and committed,
+    without loading them back, so memory stays bounded by the chunk size.
+    """
+    taken: Set[int] = set()
+    total = matched = 0
+    for rows in chunks:
+        assigned, scores = score_rows(session, rows, taken)
+        now = datetime.utcnow()
+        values = []
+        for r, tx_id, score in zip(rows, assigned.tolist(), scores.tolist()):
+            values.append({
+                "bank_ref": r.get("ref") or r.get("description", ""),
+                "transaction_id": tx_id if tx_id != -1 else None,
+                "status": "matched" if tx_id != -1 else "unmatched",
+                "notes": f"score={score}",
+                "created_at": now,
+            })
+        if values:
+            session.execute(insert(ReconciliationMatch), values)
+            session.commit()
+        total += len(values)
+        matched += sum(1 for v in values if v["transaction_id"] is not None)
+        yield {"processed": total, "matched": matched}
@@ -0,0 +1,203 @@
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+from sqlalchemy import bindparam, delete, func, insert, update
+from sqlmodel import Session, select
+from ..models import Transaction, Account, Direction, ExchangeRate, MonthlyRollup
+from .fx import convert_many
+
+RollupKey = Tuple[Optional[int], Optional[str], Direction, date]
+
+def ledger_version(session: Session) -> str:
+    """Version of the data period totals are computed from, read from the database.
+
+    Highest transaction id, highest exchange rate id and latest rate update:
+    it moves with every insert or rate change, whichever worker made it, and
+    only grows, so a value computed after reading it is never older than it.
+    """
+    tx_id, fx_id, fx_at = session.exec(select(
+        select(func.max(Transaction.id)).scalar_subquery(),
+        select(func.max(ExchangeRate.id)).scalar_subquery(),
+        select(func.max(ExchangeRate.updated_at)).scalar_subquery(),
+    )).one()
+    return f"{tx_id or 0}:{fx_id or 0}:{fx_at or ''}"
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _currencies(session: Session, account_ids: Iterable[Optional[int]]) -> Dict[Optional[int], str]:
+    ids = {a for a in account_ids if a}
+    curs: Dict[Optional[int], str] = {None: "EUR"}
+    if ids:
+        for acc_id, cur in session.exec(select(Account.id, Account.currency).where(Account.id.in_(ids))).all():
+            curs[acc_id] = cur
+    return curs
+
+
+def _apply_deltas(session: Session, deltas: Dict[RollupKey, list]) -> None:
+    """Add deltas with one lookup query, one executemany UPDATE and one INSERT.
+
+    Existing rows are incremented in SQL (`amount = amount + :d`) so writers
+    never overwrite each other; a key created concurrently by two writers
+    ends up as two rows, which readers sum anyway.
+    """
+    table = MonthlyRollup.__table__
+    existing: Dict[RollupKey, int] = {}
+    for rid, acc_id, cat, direction, month in session.exec(
+        select(MonthlyRollup.id, MonthlyRollup.account_id, MonthlyRollup.category, MonthlyRollup.direction, MonthlyRollup.month)
+        .where(MonthlyRollup.month.in_({k[3] for k in deltas}))
+    ).all():
+        existing.setdefault((acc_id, cat, Direction(direction), month), rid)
+    updates, inserts = [], []
+    for key, (amount, amount_base, count) in deltas.items():
+        if key in existing:
+            updates.append({"rid": existing[key], "d_amount": amount, "d_base": amount_base, "d_count": count})
+        else:
+            inserts.append({
+                "account_id": key[0], "category": key[1], "direction": key[2], "month": key[3],
+                "amount": amount, "amount_base": amount_base, "tx_count": count,
+            })
+    if updates:
+        session.execute(
+            update(table)
+            .where(table.c.id == bindparam("rid"))
+            .values(
+                amount=table.c.amount + bindparam("d_amount"),
+                amount_base=table.c.amount_base + bindparam("d_base"),
+                tx_count=table.c.tx_count + bindparam("d_count"),
+            ),
+            updates,
+        )
+    if inserts:
+        session.execute(insert(table), inserts)
+    if any(v[2] < 0 for v in deltas.values()):
+        session.execute(delete(table).where(table.c.tx_count <= 0))
+
+
+def apply_rows(session: Session, rows: Iterable[Mapping], sign: int = 1) -> None:
+    """Add (sign=1) or remove (sign=-1) transactions from the rollup.
+
+    `rows` are mappings with the Transaction columns the rollup is keyed on
+    (account_id, category, direction, date, amount), e.g. the values of a
+    bulk insert. Does not commit: call it before the caller's commit so the
+    rollup moves in the same unit of work as the transactions themselves.
+    Report snapshots covering the rows' dates are dropped in the same way.
+    """
+    from .snapshots import invalidate_dates
+
+    # Sum per (key, day) first: FX conversion then runs once per group, not per row
+    per_day: Dict[tuple, list] = defaultdict(lambda: [0.0, 0])
+    for r in rows:
+        acc = per_day[(r["account_id"], r["category"], r["direction"], r["date"])]
+        acc[0] += r["amount"]
+        acc[1] += 1
+    if not per_day:
+        return
+    keys = list(per_day)
+    curs = _currencies(session, (k[0] for k in keys))
+    base = convert_many(
+        session,
+        [per_day[k][0] for k in keys],
+        [curs.get(k[0], "EUR") for k in keys],
+        [k[3] for k in keys],
+    )
+    deltas: Dict[RollupKey, list] = defaultdict(lambda: [0.0, 0.0, 0])
+    for k, amt_base in zip(keys, base.tolist()):
+        amount, count = per_day[k]
+        acc = deltas[(k[0], k[1], Direction(k[2]), month_start(k[3]))]
+        acc[0] += sign * amount
+        acc[1] += sign * amt_base
+        acc[2] += sign * count
+    _apply_deltas(session, deltas)
+    invalidate_dates(session, (k[3] for k in keys))
+
+
+def apply_transactions(session: Session, txs: Iterable[Transaction], sign: int = 1) -> None:
+    """`apply_rows` for ORM transactions."""
+    apply_rows(session, (
+        {"account_id": t.account_id, "category": t.category, "direction": t.direction, "date": t.date, "amount": t.amount}
+        for t in txs
+    ), sign)
+
+
+def rebuild_rollups(session: Session, since: Optional[date] = None, currency: Optional[str] = None) -> int:
+    """Recompute the rollup from raw transactions and commit.
+
+    `since` limits the rebuild to months from that date on, `currency` to the
+    accounts held in that currency (used when an exchange rate changes).
+    Returns the number of rollup rows written.
+    """
+    acc_ids = None
+    if currency:
+        acc_ids = session.exec(select(Account.id).where(Account.currency == currency)).all()
+        if not acc_ids:
+            return 0
+    since_month = month_start(since) if since else None
+
+    purge = delete(MonthlyRollup)
+    q = (
+        select(
+            Transaction.account_id,
+            func.coalesce(Account.currency, "EUR"),
+            Transaction.category,
+            Transaction.direction,
+            Transaction.date,
+            func.sum(Transaction.amount),
+            func.count(),
+        )
+        .select_from(Transaction)
+        .outerjoin(Account, Transaction.account_id == Account.id)
+        .group_by(Transaction.account_id, Transaction.category, Transaction.direction, Transaction.date)
+    )
+    if since_month:
+        purge = purge.where(MonthlyRollup.month >= since_month)
+        q = q.where(Transaction.date >= since_month)
+    if acc_ids is not None:
+        purge = purge.where(MonthlyRollup.account_id.in_(acc_ids))
+        q = q.where(Transaction.account_id.in_(acc_ids))
+    session.execute(purge)
+
+    rows = session.exec(q).all()
+    base = convert_many(session, [r[5] for r in rows], [r[1] for r in rows], [r[4] for r in rows])
+    sums: Dict[RollupKey, list] = defaultdict(lambda: [0.0, 0.0, 0])
+    for r, amt_base in zip(rows, base.tolist()):
+        acc = sums[(r[0], r[2], Direction(r[3]), month_start(r[4]))]
+        acc[0] += r[5]
+        acc[1] += amt_base
+        acc[2] += r[6]
+    session.add_all(
+        MonthlyRollup(account_id=k[0], category=k[1], direction=k[2], month=k[3], amount=v[0], amount_base=v[1], tx_count=v[2])
+        for k, v in sums.items()
+    )
+    from .snapshots import invalidate_range
+
+    invalidate_range(session, since_month or date.min)
+    session.commit()
+    return len(sums)
+
+
+def ensure_rollups(session: Session) -> None:
+    """Build the rollup once for databases that predate it."""
+    if session.exec(select(MonthlyRollup.id).limit(1)).first() is None and \
+            session.exec(select(Transaction.id).limit(1)).first() is not None:
+        rebuild_rollups(session)
+
+
+def period_totals_from_rollup(session: Session, start: date, end: date) -> Tuple[float, float]:
+    rows = session.exec(
+        select(MonthlyRollup.direction, func.sum(MonthlyRollup.amount_base))
+        .where(MonthlyRollup.month >= start, MonthlyRollup.month < end)
+        .group_by(MonthlyRollup.direction)
+    ).all()
+    totals = {Direction(d): float(v or 0.0) for d, v in rows}
+    return totals.get(Direction.income, 0.0), totals.get(Direction.expense, 0.0)
+
+
+if __name__ == "__main__":
+    from ..db import engine, init_db
+
+    init_db()
+    with Session(engine) as s:
+        print(f"rollup rows rebuilt: {rebuild_rollups(s)}")
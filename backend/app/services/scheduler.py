@@ -1,58 +1,237 @@
-from apscheduler.schedulers.background import BackgroundScheduler
-from datetime import date, timedelta
+import json
+import logging
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import bindparam, func, or_, update
 from sqlmodel import select
-from .fx import convert
+from .alerts import AlertSignal, raise_alerts, archive_resolved_alerts
+from .fx import convert_many
 from ..core.config import settings
 from ..db import engine
 from sqlmodel import Session
-from ..models import Transaction, Direction, Account, Invoice, Budget, BudgetLine, Alert
+from ..models import Transaction, Direction, Account, Invoice, Budget, BudgetLine, SchedulerState
 
-scheduler: BackgroundScheduler | None = None
+if TYPE_CHECKING:  # apscheduler is imported when the scheduler starts
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+logger = logging.getLogger(__name__)
+
+JOB = "finance_checks"
+# Pending id gaps kept (the highest ones): older holes are deletions and rolled-back inserts
+MAX_PENDING_GAPS = 100
+
+scheduler: Optional["BackgroundScheduler"] = None
+
+
+@contextmanager
+def _phase(timings: Dict[str, float], name: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = (time.perf_counter() - t0) * 1000
+
+
+def _line_spend(
+    session: Session, until_tx_id: int, since_tx_id: int = 0, line_ids: Optional[List[int]] = None,
+    exclude: Sequence[Sequence] = (), tx_ids: Optional[List[int]] = None,
+) -> Dict[int, float]:
+    """Expenses per budget line (base currency) from transactions with id in (`since_tx_id`, `until_tx_id`].
+
+    Ids within the `exclude` gaps ([first_id, last_id, ...]) are left out;
+    `tx_ids` replaces the id range with an explicit list. One grouped query
+    over lines x transactions matched on category and the budget's dates, per
+    currency and day so FX conversion runs per group.
+    """
+    cur = func.coalesce(Account.currency, settings.BASE_CURRENCY)
+    if tx_ids is not None:
+        ids = [Transaction.id.in_(tx_ids)]
+    else:
+        ids = [Transaction.id > since_tx_id, Transaction.id <= until_tx_id]
+    if exclude:
+        ids.append(~or_(*[Transaction.id.between(g[0], g[1]) for g in exclude]))
+    q = (
+        select(BudgetLine.id, cur, Transaction.date, func.sum(Transaction.amount))
+        .select_from(BudgetLine)
+        .join(Budget, Budget.id == BudgetLine.budget_id)
+        .join(Transaction, Transaction.category == BudgetLine.category)
+        .outerjoin(Account, Account.id == Transaction.account_id)
+        .where(
+            Transaction.direction == Direction.expense,
+            Transaction.date >= Budget.start_date,
+            Transaction.date <= Budget.end_date,
+            *ids,
+        )
+        .group_by(BudgetLine.id, cur, Transaction.date)
+    )
+    if line_ids is not None:
+        q = q.where(BudgetLine.id.in_(line_ids))
+    rows = session.exec(q).all()
+    spent: Dict[int, float] = defaultdict(float)
+    base = convert_many(session, [r[3] for r in rows], [r[1] for r in rows], [r[2] for r in rows])
+    for r, amt in zip(rows, base.tolist()):
+        spent[r[0]] += amt
+    return spent
+
+
+def _find_gaps(session: Session, since_tx_id: int, until_tx_id: int, now: datetime) -> List[list]:
+    """Missing ids in (`since_tx_id`, `until_tx_id`] as [first_id, last_id, first_seen] ranges.
+
+    With concurrent writers (Postgres sequences) an id can be allocated before
+    a lower one is committed; rolled-back inserts leave holes for good.
+    """
+    prev = func.lag(Transaction.id, 1, since_tx_id).over(order_by=Transaction.id)
+    ids = (
+        select(Transaction.id.label("id"), prev.label("prev"))
+        .where(Transaction.id > since_tx_id, Transaction.id <= until_tx_id)
+        .subquery()
+    )
+    seen = now.isoformat()
+    return [[p + 1, i - 1, seen] for p, i in session.exec(select(ids.c.prev, ids.c.id).where(ids.c.id - ids.c.prev > 1)).all()]
+
+
+def _fill_gaps(session: Session, gaps: List[list], now: datetime) -> Tuple[List[int], List[list]]:
+    """Ids of `gaps` committed since, and the gaps still open (the expired ones dropped)."""
+    if not gaps:
+        return [], []
+    found = session.exec(
+        select(Transaction.id).where(or_(*[Transaction.id.between(g[0], g[1]) for g in gaps])).order_by(Transaction.id)
+    ).all()
+    cutoff = (now - timedelta(minutes=settings.BUDGET_GAP_WAIT_MINUTES)).isoformat()
+    still = []
+    for lo, hi, seen in gaps:
+        if seen < cutoff:
+            continue
+        for i in found[bisect_left(found, lo):bisect_right(found, hi)]:
+            if i > lo:
+                still.append([lo, i - 1, seen])
+            lo = i + 1
+        if lo <= hi:
+            still.append([lo, hi, seen])
+    return list(found), still
+
+
+def mark_budgets_dirty(session: Session) -> None:
+    """Have the next check recompute every budget line; commit with the change that calls it.
+
+    For writes the incremental pass cannot see: categories set on existing
+    transactions, new exchange rates.
+    """
+    session.exec(update(SchedulerState).where(SchedulerState.job == JOB).values(last_full_run=None))
+
+
+def _update_budget_lines(session: Session, state: SchedulerState, max_tx_id: int, now: datetime) -> None:
+    """Bring BudgetLine.spent_amount up to date with as little work as possible.
+
+    Normally only transactions created since the watermark are added to the
+    lines they fall in, and lines created since the last run are computed in
+    full. All lines are recomputed on the first run, after `mark_budgets_dirty`
+    (categorization, new exchange rates) and every BUDGET_FULL_RECOMPUTE_HOURS
+    as a backstop.
+
+    Ids the watermark passes that are not committed yet are kept in
+    `state.pending_gaps` and left out of every sum; each run adds the ones
+    committed since, for BUDGET_GAP_WAIT_MINUTES.
+    """
+    table = BudgetLine.__table__
+    # Gaps are read before the sums, which exclude them: a row committing in between is counted once, later
+    found, gaps = _fill_gaps(session, json.loads(state.pending_gaps or "[]"), now)
+    gaps = (gaps + _find_gaps(session, state.last_transaction_id, max_tx_id, now))[-MAX_PENDING_GAPS:]
+    full_due = state.last_full_run is None or now - state.last_full_run >= timedelta(hours=settings.BUDGET_FULL_RECOMPUTE_HOURS)
+    if full_due:
+        spent = _line_spend(session, max_tx_id, exclude=gaps)
+        values = [{"lid": lid, "spent": spent.get(lid, 0.0)} for lid in session.exec(select(BudgetLine.id)).all()]
+        state.last_full_run = now
+    else:
+        new_lines = session.exec(select(BudgetLine.id).where(BudgetLine.id > state.last_budget_line_id)).all()
+        values = []
+        if new_lines:
+            spent = _line_spend(session, max_tx_id, line_ids=new_lines, exclude=gaps)
+            values = [{"lid": lid, "spent": spent.get(lid, 0.0)} for lid in new_lines]
+        delta = _line_spend(session, max_tx_id, since_tx_id=state.last_transaction_id, exclude=gaps)
+        if found:
+            for lid, d in _line_spend(session, max_tx_id, tx_ids=found).items():
+                delta[lid] += d
+        new = set(new_lines)
+        deltas = [{"lid": lid, "d": d} for lid, d in delta.items() if lid not in new]
+        if deltas:
+            session.execute(
+                update(table).where(table.c.id == bindparam("lid")).values(spent_amount=table.c.spent_amount + bindparam("d")),
+                deltas,
+            )
+    if values:
+        session.execute(update(table).where(table.c.id == bindparam("lid")).values(spent_amount=bindparam("spent")), values)
+        state.last_budget_line_id = max(state.last_budget_line_id, max(v["lid"] for v in values))
+    state.last_transaction_id = max_tx_id
+    state.pending_gaps = json.dumps(gaps)
 
 
 def check_notifications():
     today = date.today()
+    now = datetime.utcnow()
+    timings: Dict[str, float] = {}
+    with Session(engine) as session:
+        state = session.get(SchedulerState, JOB) or SchedulerState(job=JOB)
+        # Upper bound read first: rows inserted during the run wait for the next one
+        max_tx_id = session.exec(select(func.max(Transaction.id))).one() or 0
+        signals: List[AlertSignal] = []
+        with _phase(timings, "cash"):
+            low = session.exec(
+                select(Account.id, Account.name, Account.current_balance, Account.currency)
+                .where(Account.current_balance < settings.CASH_MIN_THRESHOLD)
+            ).all()
+            for acc_id, name, balance, currency in low:
+                signals.append(AlertSignal(f"cash:account:{acc_id}", "cash", "warning", f"Solde bas sur {name}: {balance:.2f} {currency}"))
+        with _phase(timings, "invoices"):
+            # Upcoming invoice due (7 days)
+            upcoming = session.exec(select(Invoice).where(Invoice.status == "open", Invoice.due_date <= today + timedelta(days=7))).all()
+            for inv in upcoming:
+                signals.append(AlertSignal(
+                    f"invoice_due:invoice:{inv.id}", "invoice_due", "info",
+                    f"Échéance proche: {inv.counterparty} {inv.amount:.2f} {inv.currency} le {inv.due_date}",
+                ))
+        with _phase(timings, "budget_spend"):
+            _update_budget_lines(session, state, max_tx_id, now)
+        with _phase(timings, "budget_alerts"):
+            over = session.exec(
+                select(BudgetLine.id, Budget.name, BudgetLine.category, BudgetLine.spent_amount, BudgetLine.limit_amount)
+                .join(Budget, Budget.id == BudgetLine.budget_id)
+                .where(BudgetLine.spent_amount > BudgetLine.limit_amount)
+            ).all()
+            for line_id, name, category, spent, limit in over:
+                signals.append(AlertSignal(
+                    f"budget_over:line:{line_id}", "budget_over", "warning",
+                    f"Budget {name}/{category} dépassé: {spent:.2f}>{limit:.2f}",
+                ))
+        with _phase(timings, "alerts"):
+            counts = raise_alerts(session, signals, now)
+        state.updated_at = now
+        session.add(state)
+        with _phase(timings, "commit"):
+            session.commit()
+    logger.info(
+        "check_notifications: %s (total %.1f ms); alerts opened %d, repeated %d",
+        ", ".join(f"{k} {v:.1f} ms" for k, v in timings.items()), sum(timings.values()),
+        counts["opened"], counts["repeated"],
+    )
+
+
+def compact_alerts():
     with Session(engine) as session:
-        # Low cash per account
-        accounts = session.exec(select(Account)).all()
-        for acc in accounts:
-            if acc.current_balance < settings.CASH_MIN_THRESHOLD:
-                session.add(Alert(type="cash", severity="warning", message=f"Solde bas sur {acc.name}: {acc.current_balance:.2f} {acc.currency}"))
-        # Upcoming invoice due (7 days)
-        upcoming = session.exec(select(Invoice).where(Invoice.status == "open", Invoice.due_date <= today + timedelta(days=7))).all()
-        for inv in upcoming:
-            session.add(Alert(type="invoice_due", severity="info", message=f"Échéance proche: {inv.counterparty} {inv.amount:.2f} {inv.currency} le {inv.due_date}"))
-        # Budgets overspend: recompute spent by summing tx in period & category
-        budgets = session.exec(select(Budget)).all()
-        for b in budgets:
-            lines = session.exec(select(BudgetLine).where(BudgetLine.budget_id == b.id)).all()
-            for line in lines:
-                txs = session.exec(
-                    select(Transaction).where(
-                        Transaction.category == line.category,
-                        Transaction.date >= b.start_date,
-                        Transaction.date <= b.end_date,
-                    )
-                ).all()
-                spent = 0.0
-                for t in txs:
-                    # Convert to base currency for aggregation (optional)
-                    acc = session.get(Account, t.account_id) if t.account_id else None
-                    cur = acc.currency if acc else settings.BASE_CURRENCY
-                    amt = convert(session, t.amount, cur, t.date)
-                    if t.direction == Direction.expense:
-                        spent += amt
-                line.spent_amount = spent
-                session.add(line)
-                if spent > line.limit_amount:
-                    session.add(Alert(type="budget_over", severity="warning", message=f"Budget {b.name}/{line.category} dépassé: {spent:.2f}>{line.limit_amount:.2f}"))
-        session.commit()
+        archive_resolved_alerts(session)
 
 
 def start_scheduler():
     global scheduler
     if scheduler:
         return
+    from apscheduler.schedulers.background import BackgroundScheduler
+
     scheduler = BackgroundScheduler()
-    scheduler.add_job(check_notifications, "interval", minutes=5, id="finance_checks", replace_existing=True)
+    scheduler.add_job(check_notifications, "interval", minutes=5, id=JOB, replace_existing=True)
+    scheduler.add_job(compact_alerts, "interval", hours=24, id="alert_retention", replace_existing=True)
     scheduler.start()
@@ -0,0 +1,162 @@
+from typing import Dict, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Session
+from ..core.config import settings
+
+# One index row per searchable entity; rowid = kind code * KIND_SPAN + entity id, so
+# write triggers address entries without a lookup and each kind is a rowid range.
+KINDS = ("transaction", "invoice", "budget", "document")
+KIND_SPAN = 1 << 40
+
+# kind -> (table, SQL expression of the indexed text over `src`, columns whose update re-indexes)
+SOURCES: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {
+    "transaction": ('"transaction"', "coalesce(src.description, '') || ' ' || coalesce(src.category, '')", ("description", "category")),
+    "invoice": ("invoice", "coalesce(src.counterparty, '')", ("counterparty",)),
+    "budget": ("budget", "coalesce(src.name, '')", ("name",)),
+    "document": ("document", "coalesce(src.original_filename, '')", ("original_filename",)),
+}
+
+MIN_TERM = 3  # trigram index: shorter terms cannot be looked up
+
+
+def _body(kind: str, alias: str) -> str:
+    return SOURCES[kind][1].replace("src.", f"{alias}.")
+
+
+def _key(kind: str, alias: str) -> str:
+    return f"{KINDS.index(kind) * KIND_SPAN} + {alias}.id"
+
+
+def _sqlite_ddl() -> List[str]:
+    stmts = ["CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(body, tokenize='trigram')"]
+    for kind, (table, _, cols) in SOURCES.items():
+        ins = f"INSERT INTO search_index(rowid, body) VALUES ({_key(kind, 'new')}, {_body(kind, 'new')});"
+        dele = f"DELETE FROM search_index WHERE rowid = {_key(kind, 'old')};"
+        stmts += [
+            f"CREATE TRIGGER IF NOT EXISTS search_{kind}_ai AFTER INSERT ON {table} BEGIN {ins} END",
+            f"CREATE TRIGGER IF NOT EXISTS search_{kind}_au AFTER UPDATE OF {', '.join(cols)} ON {table} BEGIN {dele} {ins} END",
+            f"CREATE TRIGGER IF NOT EXISTS search_{kind}_ad AFTER DELETE ON {table} BEGIN {dele} END",
+        ]
+    return stmts
+
+
+def _postgres_ddl() -> List[str]:
+    # Same table shape; pg_trgm GIN index for substring matches, tsvector for word ranking
+    stmts = [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE TABLE IF NOT EXISTS search_index (rowid BIGINT PRIMARY KEY, body TEXT NOT NULL,"
+        " tsv tsvector GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED)",
+        "CREATE INDEX IF NOT EXISTS ix_search_index_trgm ON search_index USING gin (body gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_search_index_tsv ON search_index USING gin (tsv)",
+    ]
+    for kind, (table, _, cols) in SOURCES.items():
+        stmts += [
+            f"""CREATE OR REPLACE FUNCTION search_{kind}_sync() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP <> 'INSERT' THEN DELETE FROM search_index WHERE rowid = {_key(kind, 'OLD')}; END IF;
+  IF TG_OP <> 'DELETE' THEN INSERT INTO search_index(rowid, body) VALUES ({_key(kind, 'NEW')}, {_body(kind, 'NEW')}); END IF;
+  RETURN NULL;
+END $$ LANGUAGE plpgsql""",
+            f"DROP TRIGGER IF EXISTS search_{kind}_sync ON {table}",
+            f"CREATE TRIGGER search_{kind}_sync AFTER INSERT OR DELETE OR UPDATE OF {', '.join(cols)} ON {table}"
+            f" FOR EACH ROW EXECUTE FUNCTION search_{kind}_sync()",
+        ]
+    return stmts
+
+
+def _create(conn: Connection) -> None:
+    for stmt in _sqlite_ddl() if conn.dialect.name == "sqlite" else _postgres_ddl():
+        conn.exec_driver_sql(stmt)
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """Create the index and its write triggers if missing; backfill an empty index."""
+    with engine.begin() as conn:
+        _create(conn)
+        if conn.execute(text("SELECT rowid FROM search_index LIMIT 1")).first() is None:
+            _fill(conn)
+
+
+def _fill(conn: Connection) -> int:
+    total = 0
+    for kind, (table, _, _) in SOURCES.items():
+        total += conn.exec_driver_sql(
+            f"INSERT INTO search_index(rowid, body) SELECT {_key(kind, 'src')}, {_body(kind, 'src')} FROM {table} src"
+        ).rowcount or 0
+    return total
+
+
+def rebuild_search_index(engine: Engine) -> int:
+    """Drop and re-index every entity; returns the number of rows indexed."""
+    with engine.begin() as conn:
+        _create(conn)
+        conn.exec_driver_sql("DELETE FROM search_index")
+        total = _fill(conn)
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("INSERT INTO search_index(search_index) VALUES ('optimize')")
+    return total
+
+
+def _fts_query(q: str) -> str:
+    # Each term quoted (FTS5 query syntax disabled), all terms required
+    terms = [t for t in q.split() if len(t) >= MIN_TERM]
+    return " AND ".join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+def search_ids(session: Session, q: str, per_kind: int = 10) -> List[Tuple[str, int, float]]:
+    """Best matches for `q` as (kind, id, score), best first, at most `per_kind` per kind.
+
+    SQLite ranks with FTS5's BM25 over the trigram index, which also makes
+    every term a substring (hence prefix) match. Postgres matches through the
+    pg_trgm index and ranks with ts_rank plus trigram word similarity. Scores
+    are higher-is-better and comparable across kinds.
+
+    Ranking costs a few microseconds per match, so a common term over
+    millions of rows is only ranked among the SEARCH_RANK_WINDOW most recent
+    matches of each kind: latency stays flat as tables grow. Terms shorter
+    than MIN_TERM cannot be looked up: they filter the hits of the longer
+    terms as substrings. A query without any longer term returns nothing
+    (callers fall back to LIKE).
+    """
+    terms = [t for t in q.split() if len(t) >= MIN_TERM]
+    if not terms:
+        return []
+    short = [t for t in q.split() if len(t) < MIN_TERM]
+    if session.get_bind().dialect.name == "sqlite":
+        # LIKE is case-insensitive (ASCII) in SQLite, as the trigram tokenizer is
+        like = "LIKE"
+        matched = "SELECT rowid AS id, -rank AS score FROM search_index WHERE search_index MATCH :match"
+        params: Dict = {"match": _fts_query(q)}
+    else:
+        like = "ILIKE"
+        likes = " AND ".join(f"body ILIKE :t{i}" for i in range(len(terms)))
+        matched = (
+            "SELECT rowid AS id, ts_rank(tsv, plainto_tsquery('simple', :q)) + word_similarity(:q, body) AS score"
+            f" FROM search_index WHERE {likes}"
+        )
+        params = {"q": q, **{f"t{i}": f"%{t}%" for i, t in enumerate(terms)}}
+    matched += "".join(f" AND body {like} :s{i}" for i in range(len(short)))
+    params.update({f"s{i}": f"%{t}%" for i, t in enumerate(short)})
+    sql = text(
+        f"SELECT id, score FROM ({matched} AND rowid BETWEEN :lo AND :hi ORDER BY rowid DESC LIMIT :window) recent"
+        " ORDER BY score DESC LIMIT :per_kind"
+    )
+    hits: List[Tuple[str, int, float]] = []
+    for code, kind in enumerate(KINDS):
+        lo = code * KIND_SPAN
+        rows = session.execute(sql, {
+            **params, "lo": lo, "hi": lo + KIND_SPAN - 1,
+            "window": settings.SEARCH_RANK_WINDOW, "per_kind": per_kind,
+        }).all()
+        hits += [(kind, rid - lo, float(score)) for rid, score in rows]
+    hits.sort(key=lambda h: -h[2])
+    return hits
+
+
+if __name__ == "__main__":
+    from ..db import engine, init_db
+
+    init_db()
+    ensure_search_index(engine)
+    print(f"search index rebuilt: {rebuild_search_index(engine)} rows")
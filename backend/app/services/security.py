@@ -1,25 +1,45 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from sqlmodel import Session, select
 from ..core.config import settings
-from ..db import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..db import engine, get_async_session
 from ..models import User
 
 # Use pbkdf2_sha256 to avoid OS/backend issues with bcrypt on some environments
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+ROLES = ("admin", "finance_manager", "accountant", "user")
+
+# pbkdf2 is CPU-bound (and releases the GIL): all hashing goes through this bounded pool so a
+# burst of logins uses at most PASSWORD_HASH_WORKERS cores and no request-handling threads
+_hash_pool = ThreadPoolExecutor(max_workers=max(1, settings.PASSWORD_HASH_WORKERS), thread_name_prefix="pwhash")
+
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _hash_pool.submit(pwd_context.hash, password).result()
 
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+    return _hash_pool.submit(pwd_context.verify, password, hashed).result()
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.wrap_future(_hash_pool.submit(pwd_context.hash, password))
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await asyncio.wrap_future(_hash_pool.submit(pwd_context.verify, password, hashed))
 
 
 def create_access_token(subject: str, expires_minutes: int = 60 * 24) -> str:
@@ -28,35 +48,112 @@ def create_access_token(subject: str, expires_minutes: int = 60 * 24) -> str:
     return jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGO)
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)
-) -> User:
-    cred_exc = HTTPException(
+def _credentials_error() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _decode(token: str) -> Tuple[str, float]:
+    """Subject (email) and expiry timestamp of a valid token."""
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGO])
-        email: Optional[str] = payload.get("sub")
-        if email is None:
-            raise cred_exc
     except JWTError:
-        raise cred_exc
+        raise _credentials_error()
+    email: Optional[str] = payload.get("sub")
+    if email is None:
+        raise _credentials_error()
+    return email, float(payload.get("exp") or 0)
+
+
+class PrincipalCache:
+    """Users resolved from bearer tokens, kept AUTH_CACHE_TTL_SECONDS.
+
+    Keyed by token, so a hit skips both the JWT check and the user query; an
+    entry never outlives its token. Entries are detached User copies, shared
+    between requests: read them, never modify them. `/users` drops a user's
+    entries when their role or active flag changes; other worker processes
+    pick the change up when their entries expire.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Tuple[float, User]] = {}
+        self._lock = threading.Lock()  # never held across I/O (see narratives)
+
+    def get(self, token: str) -> Optional[User]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            self._entries.pop(token, None)
+            return None
+        return entry[1]
+
+    def put(self, token: str, user: User, token_exp: float) -> None:
+        if settings.AUTH_CACHE_TTL_SECONDS <= 0:
+            return
+        expires = min(time.time() + settings.AUTH_CACHE_TTL_SECONDS, token_exp or float("inf"))
+        with self._lock:
+            while len(self._entries) >= settings.AUTH_CACHE_MAX_ENTRIES:
+                self._entries.pop(next(iter(self._entries)))  # oldest first
+            self._entries[token] = (expires, user)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in [t for t, (_, u) in self._entries.items() if u.id == user_id]:
+                self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+principals = PrincipalCache()
+
+
+def _load_principal(session: Session, token: str) -> User:
+    email, exp = _decode(token)
     user = session.exec(select(User).where(User.email == email)).first()
     if not user or not user.is_active:
-        raise cred_exc
-    return user
+        raise _credentials_error()
+    principal = User(id=user.id, email=user.email, hashed_password="", is_active=user.is_active, role=user.role)
+    principals.put(token, principal, exp)
+    return principal
+
+
+def _load_principal_standalone(token: str) -> User:
+    # Own short session: holding the request's connection until the endpoint gets a
+    # threadpool slot can exhaust the pool
+    with Session(engine) as session:
+        return _load_principal(session, token)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    """User behind the bearer token.
+
+    Cached principals are served on the event loop without a thread hop;
+    misses decode the token and query the user on the threadpool.
+    """
+    return principals.get(token) or await run_in_threadpool(_load_principal_standalone, token)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_async_session)
+) -> User:
+    """get_current_user for async routes (ASYNC_DB=true)."""
+    return principals.get(token) or await session.run_sync(_load_principal, token)
 
 
-def require_admin(user: User = Depends(get_current_user)) -> User:
+async def require_admin(user: User = Depends(get_current_user)) -> User:
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin only")
     return user
 
 
 def require_roles(allowed: list[str]):
-    def _dep(user: User = Depends(get_current_user)) -> User:
+    async def _dep(user: User = Depends(get_current_user)) -> User:
         if user.role not in allowed:
             raise HTTPException(status_code=403, detail="Forbidden for role")
         return user
@@ -0,0 +1,113 @@
+import json
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import bindparam, delete, update
+from sqlmodel import Session, select
+from ..db import READ_ONLY, engine
+from ..models import Report, ReportType
+from .aggregates import period_totals
+from .rollup import ledger_version
+
+# Period reports (monthly, quarterly, annual) share one Report row per period:
+# the cached totals (with their ledger version) under "totals", the monthly
+# narrative fields next to them.
+SNAPSHOT_TYPE = ReportType.income_statement
+
+
+def load_report(session: Session, start: date, last_day: date) -> Optional[Report]:
+    return session.exec(
+        select(Report).where(
+            Report.type == SNAPSHOT_TYPE,
+            Report.period_start == start,
+            Report.period_end == last_day,
+        ).order_by(Report.id.desc())
+    ).first()
+
+
+def save_report(session: Session, start: date, last_day: date, fields: Dict) -> None:
+    """Merge `fields` into the period's content_json and commit."""
+    if session.info.get(READ_ONLY):
+        # GET request on the read engine: the snapshot is written through the primary
+        with Session(engine) as writer:
+            return save_report(writer, start, last_day, fields)
+    report = load_report(session, start, last_day) or Report(type=SNAPSHOT_TYPE, period_start=start, period_end=last_day, content_json="{}")
+    content = json.loads(report.content_json or "{}")
+    content.update(fields)
+    report.content_json = json.dumps(content, ensure_ascii=False)
+    report.created_at = datetime.utcnow()
+    session.add(report)
+    session.commit()
+
+
+def _primary_version(session: Session) -> str:
+    if session.info.get(READ_ONLY):
+        with Session(engine) as primary:
+            return ledger_version(primary)
+    return ledger_version(session)
+
+
+def cached_period_totals(session: Session, start: date, end: date) -> Tuple[float, float]:
+    """`period_totals` served from the period's Report snapshot when still valid.
+
+    Totals are stored with the `ledger_version` of the primary read before
+    computing them, and served only while the primary is still at that
+    version, whichever worker or replica wrote since. A replica behind the
+    primary computes without storing. `invalidate_dates` / `invalidate_range`
+    drop the totals of the periods a write touches.
+    """
+    last_day = end - timedelta(days=1)
+    version = _primary_version(session)
+    report = load_report(session, start, last_day)
+    totals = json.loads(report.content_json).get("totals") if report else None
+    if totals and totals.get("version") == version:
+        return totals["income"], totals["expense"]
+    # Read the version on the computing session first: its data is then at least that recent
+    fresh = not session.info.get(READ_ONLY) or ledger_version(session) == version
+    income, expense = period_totals(session, start, end)
+    if fresh and _primary_version(session) == version:
+        save_report(session, start, last_day, {"totals": {"income": income, "expense": expense, "version": version}})
+    return income, expense
+
+
+def _drop_totals(session: Session, reports) -> int:
+    """Remove the "totals" key of `reports` ((id, content_json) rows), keeping the narrative. Does not commit."""
+    table = Report.__table__
+    updates, empty = [], []
+    for rid, content_json in reports:
+        content = json.loads(content_json or "{}")
+        if content.pop("totals", None) is None:
+            continue
+        if content:
+            updates.append({"rid": rid, "content": json.dumps(content, ensure_ascii=False)})
+        else:
+            empty.append(rid)
+    if updates:
+        session.execute(update(table).where(table.c.id == bindparam("rid")).values(content_json=bindparam("content")), updates)
+    if empty:
+        session.execute(delete(Report).where(Report.id.in_(empty)))
+    return len(updates) + len(empty)
+
+
+def invalidate_dates(session: Session, dates: Iterable[date]) -> int:
+    """Drop the totals of the snapshots whose period contains one of `dates`. Does not commit."""
+    days = sorted(set(dates))
+    if not days:
+        return 0
+    stale = []
+    for rid, start, last_day, content_json in session.exec(
+        select(Report.id, Report.period_start, Report.period_end, Report.content_json)
+        .where(Report.type == SNAPSHOT_TYPE, Report.period_start <= days[-1], Report.period_end >= days[0])
+    ).all():
+        i = bisect_left(days, start)
+        if i < len(days) and days[i] <= last_day:
+            stale.append((rid, content_json))
+    return _drop_totals(session, stale)
+
+
+def invalidate_range(session: Session, since: date, until: Optional[date] = None) -> int:
+    """Drop the totals of the snapshots overlapping [since, until). Does not commit."""
+    q = select(Report.id, Report.content_json).where(Report.type == SNAPSHOT_TYPE, Report.period_end >= since)
+    if until:
+        q = q.where(Report.period_start < until)
+    return _drop_totals(session, session.exec(q).all())
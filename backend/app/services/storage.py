@@ -0,0 +1,82 @@
+"""Content-addressed storage of uploaded documents.
+
+An upload is streamed to a temporary file in UPLOAD_CHUNK_BYTES chunks while
+its SHA-256 is computed, then moved to `<DOCS_DIR>/<2 hex>/<sha256>`. Each blob
+has one `Document` row whose `ref_count` counts the uploads of that content:
+a re-upload links to the existing row (or is rejected) and its temporary
+file is dropped, so a blob is written once whatever the number of uploads.
+"""
+import hashlib
+import os
+import uuid
+from typing import BinaryIO, Optional, Tuple
+from fastapi import UploadFile
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+from ..core.config import settings
+from ..models import Document
+
+DUPLICATE_MODES = ("link", "reject")
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(settings.DOCS_DIR, sha256[:2], sha256)
+
+
+def write_blob(src: BinaryIO) -> Tuple[str, int, str]:
+    """Stream `src` into the store; returns (sha256, size, path). An existing blob is left untouched."""
+    os.makedirs(settings.DOCS_DIR, exist_ok=True)
+    tmp = os.path.join(settings.DOCS_DIR, f".upload-{uuid.uuid4().hex}")
+    digest, size = hashlib.sha256(), 0
+    try:
+        with open(tmp, "wb") as out:
+            while chunk := src.read(settings.UPLOAD_CHUNK_BYTES):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+        path = blob_path(sha256)
+        if os.path.exists(path):
+            os.remove(tmp)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp, path)  # atomic: concurrent uploads of the same content write identical bytes
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return sha256, size, path
+
+
+def find_blob(session: Session, sha256: str) -> Optional[Document]:
+    return session.exec(select(Document).where(Document.sha256 == sha256)).first()
+
+
+def _add_reference(session: Session, doc: Document) -> Document:
+    session.exec(update(Document).where(Document.id == doc.id).values(ref_count=Document.ref_count + 1))
+    session.commit()
+    session.refresh(doc)
+    return doc
+
+
+def store_upload(session: Session, file: UploadFile, link_duplicates: bool = True, **fields) -> Tuple[Document, bool]:
+    """Store an upload; returns (document, duplicate).
+
+    A duplicate returns the document already holding that content, with one
+    more reference when `link_duplicates` (unchanged otherwise, for callers
+    rejecting it). `fields` only apply to a newly created document.
+    """
+    sha256, size, path = write_blob(file.file)
+    doc = find_blob(session, sha256)
+    if doc is None:
+        doc = Document(original_filename=file.filename or sha256, stored_path=path, sha256=sha256, size_bytes=size, **fields)
+        session.add(doc)
+        try:
+            session.commit()
+            session.refresh(doc)
+            return doc, False
+        except IntegrityError:  # same content uploaded concurrently
+            session.rollback()
+            doc = find_blob(session, sha256)
+    return (_add_reference(session, doc) if link_duplicates else doc), True
@@ -1,32 +1,76 @@
-from datetime import date
-from collections import defaultdict
-from typing import Dict, List
+import threading
+from typing import Dict, List, Tuple
+import numpy as np
+from sqlalchemy import func
 from sqlmodel import Session, select
-from statsmodels.tsa.holtwinters import SimpleExpSmoothing
-from ..models import Transaction, Direction, Account
-from .fx import convert
+from ..models import Direction, MonthlyRollup
+from .rollup import ledger_version
+
+_cache_lock = threading.Lock()
+_cache: Dict[tuple, Tuple[Dict[str, float], List[float]]] = {}
 
 
 def monthly_net_series(session: Session) -> Dict[str, float]:
-    txs = session.exec(select(Transaction)).all()
-    acc_cache: dict[int, Account] = {}
-    buckets: Dict[str, float] = defaultdict(float)
-    for t in txs:
-        if t.account_id and t.account_id not in acc_cache:
-            acc_cache[t.account_id] = session.get(Account, t.account_id)
-        cur = acc_cache[t.account_id].currency if t.account_id else "EUR"
-        amt = convert(session, t.amount, cur, t.date)
-        key = f"{t.date.year}-{t.date.month:02d}"
-        if t.direction == Direction.income:
-            buckets[key] += amt
-        else:
-            buckets[key] -= amt
-    return dict(sorted(buckets.items()))
+    """Net cash flow (income - expense) per month in base currency.
+
+    Built column-wise from the monthly rollup; months without activity between
+    the first and the last one are present with an explicit 0.0.
+    """
+    rows = session.exec(
+        select(MonthlyRollup.month, MonthlyRollup.direction, func.sum(MonthlyRollup.amount_base))
+        .group_by(MonthlyRollup.month, MonthlyRollup.direction)
+    ).all()
+    if not rows:
+        return {}
+    import pandas as pd  # heavy, loaded on first forecast
+
+    months, directions, amounts = zip(*rows)
+    signed = np.where(
+        np.asarray([Direction(d) == Direction.income for d in directions]),
+        np.asarray(amounts, dtype=np.float64),
+        -np.asarray(amounts, dtype=np.float64),
+    )
+    net = pd.Series(signed, index=pd.PeriodIndex(months, freq="M")).groupby(level=0).sum()
+    net = net.reindex(pd.period_range(net.index.min(), net.index.max(), freq="M"), fill_value=0.0)
+    return {str(p): float(v) for p, v in net.items()}
+
+
+# statsmodels' heuristic initialization needs at least 10 observations
+SES_MIN_POINTS = 10
 
 
 def forecast_next(series: List[float], periods: int = 3) -> List[float]:
     if len(series) < 3:
         # naive: repeat last value
         return [series[-1] if series else 0.0] * periods
+    if len(series) < SES_MIN_POINTS:
+        # short (zero-filled) histories: the vectorized SES of the grouped forecasts
+        from .forecasting import forecast_matrix
+
+        return [float(v) for v in forecast_matrix(np.asarray([series]), periods)[0]]
+    from statsmodels.tsa.holtwinters import SimpleExpSmoothing  # ~1.5 s to import: first use only
+
     model = SimpleExpSmoothing(series, initialization_method="heuristic").fit(optimized=True)
     return list(model.forecast(periods))
+
+
+def cached_forecast(session: Session, periods: int = 3) -> Tuple[Dict[str, float], List[float]]:
+    """Series and forecast, recomputed only when the ledger changed.
+
+    The cache key is the database's `ledger_version` (transactions and
+    exchange rates), so writes and rate-driven rollup rebuilds made by other
+    workers also invalidate it.
+    """
+    key = (ledger_version(session), periods)
+    hit = _cache.get(key)
+    if hit is not None:
+        return hit
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is None:
+            series = monthly_net_series(session)
+            hit = (series, forecast_next(list(series.values()), periods=periods))
+            for stale in [k for k in _cache if k[0] != key[0]]:
+                del _cache[stale]
+            _cache[key] = hit
+        return hit
@@ -0,0 +1 @@
+# Standalone benchmarks: run from backend/ with `python -m benchmarks.<name>`
@@ -0,0 +1,153 @@
+"""Throughput of the hot read endpoints under concurrent clients, sync vs. async routes.
+
+    cd backend && python -m benchmarks.bench_async [transactions] [seconds]
+
+Seeds a throwaway SQLite file (default 50k transactions), then starts uvicorn
+on it twice, with ASYNC_DB=false and ASYNC_DB=true, and drives each with
+CONCURRENCY levels of httpx clients cycling through PATHS for `seconds`
+(default 10) per level. Reports requests/s, p50/p95 latency and errors.
+/reports/monthly is left out: it queues LLM narrative jobs.
+
+Sync routes are capped by the threadpool (40 workers by default); async
+routes by the async engine's pool. One server process in both modes, so on a
+single core the two mostly measure per-request overhead; the gap shows when
+the server has spare cores or the database adds wait time (Postgres, network).
+
+Measured on 1 CPU, 50k transactions (req/s, sync / async): 140 / 111 with
+one client, 119 / 107 at 16, 67 / 57 at 64, 44 / 38 at 256. Before the pool
+was sized and requests admitted through MAX_CONCURRENT_REQUESTS, every sync
+request failed at 256 clients on connection pool timeouts while async kept
+serving.
+"""
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CONCURRENCY = [1, 16, 64, 256]
+PATHS = [
+    "/transactions/?limit=50",
+    "/transactions/?limit=50&category=Transport&date_from=2022-01-01",
+    "/reports/quarterly?year=2022&quarter=2",
+    "/reports/annual?year=2022",
+    "/search/?q=amazon",
+    "/notifications/",
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_ready(base: str, proc: subprocess.Popen) -> None:
+    import httpx
+
+    async with httpx.AsyncClient() as client:
+        for _ in range(600):
+            if proc.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            try:
+                if (await client.get(base + "/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError("uvicorn did not start")
+
+
+async def _drive(base: str, token: str, concurrency: int, seconds: float):
+    import httpx
+
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, headers={"Authorization": f"Bearer {token}"},
+                                 limits=limits, timeout=60) as client:
+        async def worker(n: int) -> None:
+            nonlocal errors
+            i = n
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                try:
+                    r = await client.get(PATHS[i % len(PATHS)])
+                    ok = r.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - t0)
+                else:
+                    errors += 1
+                i += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+    return latencies, errors, elapsed
+
+
+async def _run_mode(async_db: bool, db_url: str, workdir: str, seconds: float):
+    import httpx
+
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "DATABASE_URL": db_url, "ASYNC_DB": str(async_db).lower(), "SEED_DEMO_USERS": "true"}
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning",
+         "--no-access-log", "--app-dir", backend],
+        cwd=workdir, env=env, stdin=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    rows = []
+    try:
+        await _wait_ready(base, proc)
+        async with httpx.AsyncClient(base_url=base) as client:
+            token = (await client.post("/auth/login", data={"username": "admin@example.com", "password": "Passw0rd!"})).json()["access_token"]
+        await _drive(base, token, 8, 1.0)  # warm-up: caches, snapshots, pool
+        for concurrency in CONCURRENCY:
+            latencies, errors, elapsed = await _drive(base, token, concurrency, seconds)
+            lat = sorted(latencies) or [0.0]
+            rows.append((concurrency, len(latencies) / elapsed, statistics.median(lat) * 1000,
+                         lat[int(len(lat) * 0.95) - 1 if len(lat) > 1 else 0] * 1000, errors))
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:  # requests still stuck on the pool
+            proc.kill()
+            proc.wait()
+    return rows
+
+
+def main() -> int:
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    workdir = tempfile.mkdtemp()
+    db_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["DATABASE_URL"] = db_url
+    os.chdir(workdir)
+    from app.db import engine, init_db
+    from benchmarks.bench_search import fill
+
+    init_db()
+    fill(engine, transactions)
+    engine.dispose()
+    print(f"{transactions:,} transactions, {seconds:.0f}s per level, {os.cpu_count()} CPU(s)")
+
+    results = {mode: asyncio.run(_run_mode(mode, db_url, workdir, seconds)) for mode in (False, True)}
+    print(f"{'clients':>8} {'mode':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for i, concurrency in enumerate(CONCURRENCY):
+        for mode in (False, True):
+            _, rps, p50, p95, errors = results[mode][i]
+            print(f"{concurrency:>8} {'async' if mode else 'sync':>6} {rps:>8.0f} {p50:>8.1f} {p95:>8.1f} {errors:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
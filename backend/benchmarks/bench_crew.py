@@ -0,0 +1,61 @@
+"""Per-request overhead of the agent layer, crew mode vs direct mode.
+
+    cd backend && python -m benchmarks.bench_crew [iterations]
+
+The LLM is stubbed out on both paths (the OpenAI client, which the agents'
+CachedChatLLM calls too, returns canned answers instantly, the response
+cache is off), so the timings are pure orchestration overhead: "crew (fresh)" rebuilds the agents
+on every request as before the pool existed, "crew (pooled)" reuses them,
+"direct" skips CrewAI.
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+
+def _fake_completion(**_params):
+    msg = SimpleNamespace(content="0|Alimentation\n1|Transport")
+    return SimpleNamespace(choices=[SimpleNamespace(message=msg)])
+
+
+def main() -> int:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.agents import crew
+    from app.core.config import settings
+    from app.services import llm
+
+    llm._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_fake_completion)))
+    settings.LLM_CACHE_ENABLED = False
+
+    rows = [
+        {"id": 1, "date": "2024-01-02", "amount": 12.5, "direction": "expense", "description": "CB CARREFOUR"},
+        {"id": 2, "date": "2024-01-03", "amount": 30.0, "direction": "expense", "description": "SNCF"},
+    ]
+    payload = {"income": 1000.0, "expense": 800.0, "net": 200.0, "year": 2024, "month": 1}
+
+    def fresh_pool():
+        crew.agent_pool = crew.AgentPool()
+
+    modes = [("crew (fresh)", "crew", fresh_pool), ("crew (pooled)", "crew", None), ("direct", "direct", None)]
+    for label, mode, before_each in modes:
+        settings.CREW_MODE = mode
+        crew.categorize_with_crew(rows)  # warm-up
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            if before_each:
+                before_each()
+            crew.categorize_with_crew(rows)
+            crew.summarize_with_crew(payload)
+        per_req = (time.perf_counter() - t0) / (2 * iterations) * 1000
+        print(f"{label:14s} {per_req:8.2f} ms/request")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""/search latency: FTS5 trigram index vs. leading-wildcard LIKE scans.
+
+    cd backend && python -m benchmarks.bench_search [transactions]
+
+Fills a throwaway SQLite file with `transactions` rows (default 1M) of
+generated payee descriptions, builds the search index with the backfill
+(`rebuild_search_index`) and times a few queries through `search_ids`
+against the ILIKE scan the endpoint used before. Reports the median over
+REPEAT runs per query.
+
+Measured at 1M transactions: 3-60 ms per query through the index whatever
+the term, vs. 1 ms to 4 s for LIKE (fast only when a frequent term fills
+the first page early; rare or absent terms scan the whole table).
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+REPEAT = 5
+QUERIES = ["amazon", "loyer bureau", "pharma", "ref4242", "00042", "zzqx"]
+PAYEES = ["Amazon Marketplace", "SNCF Voyageurs", "Loyer bureau", "Pharmacie centrale", "Carrefour Market",
+          "Orange Telecom", "Uber Trip", "Total Energies", "Salaire", "Netflix"]
+CATEGORIES = ["Logement", "Transport", "Alimentation", "Santé", "Abonnements", "Autres"]
+
+
+def fill(engine, rows: int) -> None:
+    rnd = random.Random(7)
+    start = date(2020, 1, 1)
+    with engine.begin() as conn:
+        batch = []
+        for i in range(rows):
+            batch.append((
+                (start + timedelta(days=rnd.randrange(1500))).isoformat(), round(rnd.uniform(1, 900), 2),
+                "expense", rnd.choice(CATEGORIES),
+                f"{rnd.choice(PAYEES)} {rnd.randrange(100000):05d} ref{rnd.randrange(10**6)}", "booked", "2024-01-01 00:00:00",
+            ))
+            if len(batch) == 50_000:
+                conn.exec_driver_sql(
+                    'INSERT INTO "transaction" (date, amount, direction, category, description, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    batch,
+                )
+                batch = []
+        if batch:
+            conn.exec_driver_sql(
+                'INSERT INTO "transaction" (date, amount, direction, category, description, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                batch,
+            )
+
+
+def median_ms(fn) -> float:
+    times = []
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def main() -> int:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.chdir(workdir)
+    from sqlmodel import Session, select
+    from app.db import engine, init_db
+    from app.models import Transaction
+    from app.services.search_index import rebuild_search_index, search_ids
+
+    init_db()
+    t0 = time.perf_counter()
+    fill(engine, rows)
+    print(f"{rows:,} transactions inserted in {time.perf_counter() - t0:.1f}s")
+    t0 = time.perf_counter()
+    indexed = rebuild_search_index(engine)
+    print(f"backfill: {indexed:,} rows indexed in {time.perf_counter() - t0:.1f}s")
+
+    print(f"{'query':<14}{'index ms':>10}{'like ms':>10}{'hits':>6}")
+    with Session(engine) as session:
+        for q in QUERIES:
+            fts = median_ms(lambda: search_ids(session, q))
+            like = median_ms(lambda: session.exec(
+                select(Transaction.id)
+                .where(Transaction.description.ilike(f"%{q}%") | Transaction.category.ilike(f"%{q}%"))
+                .order_by(Transaction.date.desc())
+                .limit(10)
+            ).all())
+            print(f"{q:<14}{fts:>10.1f}{like:>10.1f}{len(search_ids(session, q)):>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Cold-start regression budget: `import app.main` and time to the first `/` response.
+
+    cd backend && python -m benchmarks.bench_startup [runs]
+
+Each run starts a fresh interpreter, so nothing is cached in-process:
+
+- import: `import app.main` timed inside a new `python -c`;
+- first response: from spawning uvicorn to the first 200 on `/`, against a
+  database that already exists (a restart or a recycled worker), with and
+  without SEED_DEMO_USERS.
+
+Reports the median of `runs` (default 5) and exits non-zero when a median
+goes over its budget, e.g. after a module-level import of a heavy
+dependency (pandas, statsmodels, pdfplumber, openai, apscheduler) creeps
+back into the import graph of app.main.
+
+IMPORT_BUDGET_SECONDS / FIRST_RESPONSE_BUDGET_SECONDS: measured on 1 CPU,
+import 4.7 s -> 1.9 s and first response 5.9 s -> 2.4 s once the heavy
+imports became lazy and demo users stopped being re-verified with pbkdf2 on
+every boot; the budgets leave headroom for machine noise.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+IMPORT_BUDGET_SECONDS = 2.5
+FIRST_RESPONSE_BUDGET_SECONDS = 3.5
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_seconds(env: dict, workdir: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c",
+         "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"],
+        cwd=workdir, env={**env, "PYTHONPATH": BACKEND}, stdin=subprocess.DEVNULL, capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def first_response_seconds(env: dict, workdir: str) -> float:
+    from benchmarks.bench_async import _free_port
+
+    port = _free_port()
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning",
+         "--no-access-log", "--app-dir", BACKEND],
+        cwd=workdir, env=env, stdin=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - t0 < 60:
+            if proc.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5) as r:
+                    if r.status == 200:
+                        return time.perf_counter() - t0
+            except OSError:
+                pass
+            time.sleep(0.02)
+        raise RuntimeError("uvicorn did not start")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+def main() -> int:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    sys.path.insert(0, BACKEND)
+    workdir = tempfile.mkdtemp()
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'startup.db')}"}
+    first_response_seconds({**env, "SEED_DEMO_USERS": "true"}, workdir)  # create the schema and the users once
+
+    results = [
+        ("import app.main", IMPORT_BUDGET_SECONDS, [import_seconds(env, workdir) for _ in range(runs)]),
+        ("first response", FIRST_RESPONSE_BUDGET_SECONDS, [first_response_seconds(env, workdir) for _ in range(runs)]),
+        ("... with seeding", FIRST_RESPONSE_BUDGET_SECONDS,
+         [first_response_seconds({**env, "SEED_DEMO_USERS": "true"}, workdir) for _ in range(runs)]),
+    ]
+    failures = 0
+    print(f"median of {runs} runs, {os.cpu_count()} CPU(s)")
+    print(f"{'step':<18}{'median s':>10}{'max s':>8}{'budget s':>10}")
+    for name, budget, times in results:
+        median = statistics.median(times)
+        failures += median > budget
+        print(f"{name:<18}{median:>10.2f}{max(times):>8.2f}{budget:>10.1f}{'' if median <= budget else '  OVER BUDGET'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
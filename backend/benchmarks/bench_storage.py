@@ -0,0 +1,78 @@
+"""Document uploads: whole-file read vs. streamed, content-addressed storage.
+
+    cd backend && python -m benchmarks.bench_storage [megabytes] [uploads]
+
+Uploads the same `megabytes` (default 100) file `uploads` times (default 5)
+through the old path (`file.read()`, one timestamped copy per upload) and
+through `store_upload`, on a throwaway SQLite database. Reports the time per
+upload, the Python heap peak (tracemalloc) during an upload and the bytes on
+disk afterwards.
+
+Measured on 1 CPU, 100 MB x 5: peak heap 100 MB -> 2 MB, disk
+500 MB -> 100 MB; an upload takes about the same time (200 -> 220 ms, the
+SHA-256 is computed while writing) and a duplicate leaves no copy behind.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+
+def _disk_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def _legacy(src_path: str, store: str) -> None:
+    os.makedirs(store, exist_ok=True)
+    with open(src_path, "rb") as src, open(os.path.join(store, f"{datetime.utcnow():%Y%m%d%H%M%S%f}_bench.pdf"), "wb") as f:
+        f.write(src.read())
+
+
+def _measure(name: str, upload, uploads: int, store: str) -> None:
+    times, peak = [], 0
+    for _ in range(uploads):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        upload()
+        times.append(time.perf_counter() - t0)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    print(f"{name:<10}{sum(times) / len(times) * 1000:>12.0f}{peak / 2**20:>10.1f}{_disk_bytes(store) / 2**20:>10.0f}")
+
+
+def main() -> int:
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    uploads = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["DOCS_DIR"] = os.path.join(workdir, "blobs")
+    os.chdir(workdir)
+    from fastapi import UploadFile
+    from sqlmodel import Session
+    from app.db import engine, init_db
+    from app.services.storage import store_upload
+
+    init_db()
+    src_path = os.path.join(workdir, "src.pdf")
+    with open(src_path, "wb") as f:
+        for _ in range(megabytes):
+            f.write(os.urandom(2**20))
+
+    def streamed() -> None:
+        with open(src_path, "rb") as fh, Session(engine) as session:
+            store_upload(session, UploadFile(file=fh, filename="bench.pdf"))
+
+    print(f"{megabytes} MB file uploaded {uploads} times")
+    print(f"{'path':<10}{'ms/upload':>12}{'peak MB':>10}{'disk MB':>10}")
+    _measure("read()", lambda: _legacy(src_path, os.path.join(workdir, "legacy")), uploads, os.path.join(workdir, "legacy"))
+    _measure("streamed", streamed, uploads, os.environ["DOCS_DIR"])
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
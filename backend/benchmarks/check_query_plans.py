@@ -0,0 +1,87 @@
+"""Query-plan regression check for the hot queries (SQLite).
+
+    cd backend && python -m benchmarks.check_query_plans
+
+Builds a throwaway database through `init_db` (models + migrations), then
+runs EXPLAIN QUERY PLAN on the queries the endpoints and jobs issue and
+checks that each one is answered from the expected index. Exits non-zero,
+listing the plans, when one falls back to a table scan or picks another
+index, e.g. after a model or migration change drops an index.
+"""
+import os
+import sys
+import tempfile
+from datetime import date
+
+
+def hot_queries():
+    from sqlalchemy import func, tuple_
+    from sqlmodel import select
+    from app.models import Alert, Document, ExchangeRate, Job, MonthlyRollup, ReconciliationMatch, Report, ReportType, Transaction, User
+
+    d0, d1 = date(2024, 1, 1), date(2024, 3, 31)
+    page = (Transaction.date.desc(), Transaction.id.desc())
+    return [
+        ("transactions page", "ix_transaction_date_id",
+         select(Transaction.id, Transaction.date).order_by(*page).limit(101)),
+        ("transactions next page", "ix_transaction_date_id",
+         select(Transaction.id).where(tuple_(Transaction.date, Transaction.id) < tuple_(d1, 500)).order_by(*page).limit(101)),
+        ("transactions by category", "ix_transaction_category_date",
+         select(Transaction).where(Transaction.category == "Transport", Transaction.date >= d0).order_by(*page).limit(101)),
+        ("transactions by account", "ix_transaction_account_date",
+         select(Transaction).where(Transaction.account_id == 1, Transaction.date >= d0).order_by(*page).limit(101)),
+        ("recon candidate window", "ix_transaction_date_id",
+         select(Transaction.id, Transaction.date, Transaction.amount, Transaction.description)
+         .where(Transaction.date >= d0, Transaction.date <= d1).order_by(Transaction.date, Transaction.id)),
+        ("fx rate of the day", "ux_exchangerate_currency_date",
+         select(ExchangeRate).where(ExchangeRate.currency == "USD", ExchangeRate.date == d0)),
+        ("latest rate update", "ix_exchangerate_updated_at",
+         select(func.max(ExchangeRate.updated_at))),
+        ("fx index load", "ux_exchangerate_currency_date",
+         select(ExchangeRate.currency, ExchangeRate.date, ExchangeRate.rate_to_base)
+         .order_by(ExchangeRate.currency, ExchangeRate.date, ExchangeRate.id)),
+        ("login by email", "ux_user_email",
+         select(User).where(User.email == "admin@example.com")),
+        ("open alerts", "ix_alert_resolved_last_seen",
+         select(Alert).where(Alert.resolved == False).order_by(Alert.last_seen_at.desc(), Alert.id.desc()).limit(101)),  # noqa: E712
+        ("open alert by fingerprint", "ux_alert_open_fingerprint",
+         select(Alert.id).where(Alert.resolved == False, Alert.fingerprint == "cash:account:1")),  # noqa: E712
+        ("rollup months", "ix_monthlyrollup_month",
+         select(MonthlyRollup.direction, func.sum(MonthlyRollup.amount_base))
+         .where(MonthlyRollup.month >= d0, MonthlyRollup.month < d1).group_by(MonthlyRollup.direction)),
+        ("report snapshot", "ix_report_type_period",
+         select(Report).where(Report.type == ReportType.income_statement, Report.period_start == d0, Report.period_end == d1)),
+        ("matches of a transaction", "ix_reconciliationmatch_transaction",
+         select(ReconciliationMatch).where(ReconciliationMatch.transaction_id == 1)),
+        ("document by content hash", "ux_document_sha256",
+         select(Document).where(Document.sha256 == "0" * 64)),
+        ("active OCR job of a document", "ix_job_document_status",
+         select(Job).where(Job.document_id == 1, Job.status.in_(["queued", "running"])).order_by(Job.id.desc())),
+    ]
+
+
+def main() -> int:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'plans.db')}"
+    os.chdir(workdir)
+    from app.db import engine, init_db
+
+    init_db()
+    failures = 0
+    with engine.connect() as conn:
+        for name, index, stmt in hot_queries():
+            sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            plan = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql).all()]
+            ok = any(index in step for step in plan)
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name:<28} {index}")
+            if not ok:
+                for step in plan:
+                    print(f"       {step}")
+    print(f"{failures} regression(s)" if failures else "all hot queries use their index")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
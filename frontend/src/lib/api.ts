@@ -14,3 +14,11 @@ api.interceptors.request.use((config) => {
   }
   return config
 })
+
+// Keyset-paginated lists return the cursor of the next page in this header (absent on the last page)
+const NEXT_CURSOR_HEADER = 'x-next-cursor'
+
+export async function getPage<T>(url: string, cursor?: string | null, params: Record<string, unknown> = {}) {
+  const res = await api.get<T[]>(url, { params: { ...params, ...(cursor ? { cursor } : {}) } })
+  return { rows: res.data, next: (res.headers[NEXT_CURSOR_HEADER] as string | undefined) ?? null }
+}
@@ -1,5 +1,5 @@
 import { useEffect, useState } from 'react'
-import { api } from '@/lib/api'
+import { api, getPage } from '@/lib/api'
 import { SectionTitle } from '@/components/SectionTitle'
 
 interface Budget {
@@ -13,11 +13,18 @@ interface Budget {
 
 export function Budgets() {
   const [rows, setRows] = useState<Budget[]>([])
+  const [next, setNext] = useState<string | null>(null)
   const [form, setForm] = useState<Budget>({ name: '', period: 'monthly', start_date: new Date().toISOString().slice(0,10), end_date: new Date().toISOString().slice(0,10), total_amount: 0 })
 
   const load = async () => {
-    const { data } = await api.get<Budget[]>('/budgets')
-    setRows(data)
+    const page = await getPage<Budget>('/budgets')
+    setRows(page.rows)
+    setNext(page.next)
+  }
+  const loadMore = async () => {
+    const page = await getPage<Budget>('/budgets', next)
+    setRows(prev => [...prev, ...page.rows])
+    setNext(page.next)
   }
   useEffect(()=>{ load() },[])
 
@@ -69,6 +76,11 @@ export function Budgets() {
           </tbody>
         </table>
       </div>
+      {next && (
+        <div className="flex justify-center">
+          <button onClick={loadMore} className="border rounded-md px-3 py-2 text-sm">Charger plus</button>
+        </div>
+      )}
     </div>
   )
 }
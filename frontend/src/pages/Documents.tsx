@@ -11,9 +11,17 @@ export function Documents() {
     const form = new FormData()
     form.append('file', f)
     setBusy(true)
-    const { data } = await api.post('/invoices/ocr', form, { headers: { 'Content-Type':'multipart/form-data' } })
-    if (data?.id) setInvId(data.id)
-    setBusy(false)
+    try {
+      // OCR runs as a background job: poll its status until the invoice exists
+      let { data: job } = await api.post('/invoices/ocr', form, { headers: { 'Content-Type':'multipart/form-data' } })
+      while (job?.status === 'queued' || job?.status === 'running') {
+        await new Promise(r => setTimeout(r, 1000))
+        job = (await api.get(`/invoices/jobs/${job.job_id}`)).data
+      }
+      if (job?.invoice_id) setInvId(job.invoice_id)
+    } finally {
+      setBusy(false)
+    }
   }
   return (
     <div className="space-y-6">
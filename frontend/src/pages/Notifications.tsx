@@ -1,12 +1,16 @@
 import { SectionTitle } from '@/components/SectionTitle'
 import { useEffect, useState } from 'react'
-import { api } from '@/lib/api'
+import { api, getPage } from '@/lib/api'
 
 type Alert = { id:number; type:string; severity:string; message:string; created_at:string; resolved:boolean }
 
 export function Notifications() {
   const [rows, setRows] = useState<Alert[]>([])
-  const load = async ()=>{ const { data } = await api.get('/notifications'); setRows(data) }
+  const [next, setNext] = useState<string | null>(null)
+  // Open invoice alerts only, filtered server-side so each page is full
+  const params = { type: 'invoice_due' }
+  const load = async ()=>{ const page = await getPage<Alert>('/notifications', null, params); setRows(page.rows); setNext(page.next) }
+  const loadMore = async ()=>{ const page = await getPage<Alert>('/notifications', next, params); setRows(prev=>[...prev, ...page.rows]); setNext(page.next) }
   useEffect(()=>{ load() },[])
   const resolve = async (id:number)=>{ await api.patch(`/notifications/${id}/resolve`); await load() }
   const invoiceAlerts = rows.filter(a=>a.type==='invoice_due' && !a.resolved)
@@ -28,6 +32,11 @@ export function Notifications() {
         ))}
         {invoiceAlerts.length===0 && <div className="p-4 text-sm text-gray-500">Aucune alerte d'échéance</div>}
       </div>
+      {next && (
+        <div className="flex justify-center">
+          <button onClick={loadMore} className="border rounded-md px-3 py-2 text-sm">Charger plus</button>
+        </div>
+      )}
     </div>
   )
 }
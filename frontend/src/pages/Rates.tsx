@@ -1,18 +1,25 @@
 import { useEffect, useState } from 'react'
-import { api } from '@/lib/api'
+import { api, getPage } from '@/lib/api'
 import { SectionTitle } from '@/components/SectionTitle'
 
 interface Rate { id:number; currency:string; date:string; rate_to_base:number }
 
 export function Rates() {
   const [rows, setRows] = useState<Rate[]>([])
+  const [next, setNext] = useState<string | null>(null)
   const [currency, setCurrency] = useState('USD')
   const [rate, setRate] = useState<number>(1)
   const [date, setDate] = useState<string>('')
 
   const load = async ()=>{
-    const { data } = await api.get('/fx/rates')
-    setRows(data)
+    const page = await getPage<Rate>('/fx/rates')
+    setRows(page.rows)
+    setNext(page.next)
+  }
+  const loadMore = async ()=>{
+    const page = await getPage<Rate>('/fx/rates', next)
+    setRows(prev=>[...prev, ...page.rows])
+    setNext(page.next)
   }
   useEffect(()=>{ load() },[])
 
@@ -52,6 +59,11 @@ export function Rates() {
           </tbody>
         </table>
       </div>
+      {next && (
+        <div className="flex justify-center">
+          <button onClick={loadMore} className="border rounded-md px-3 py-2 text-sm">Charger plus</button>
+        </div>
+      )}
     </div>
   )
 }
@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { api } from '@/lib/api'
 import { SectionTitle } from '@/components/SectionTitle'
 
@@ -7,9 +7,20 @@ export function Reports() {
   const [year, setYear] = useState<number>(new Date().getFullYear())
   const [month, setMonth] = useState<number>(new Date().getMonth()+1)
 
+  const request = useRef(0)
+
   const load = async () => {
-    const { data } = await api.get('/reports/monthly', { params: { year, month } })
+    const id = ++request.current
+    let { data } = await api.get('/reports/monthly', { params: { year, month } })
     setReport(data)
+    // The narrative is written in the background: poll it until it is ready or failed
+    while (data.narrative_status === 'pending' && id === request.current) {
+      await new Promise(r => setTimeout(r, 1500))
+      const { data: n } = await api.get('/reports/monthly/narrative', { params: { year, month } })
+      if (id !== request.current) return
+      data = { ...data, narrative_status: n.narrative_status, narrative: n.narrative, error: n.error }
+      setReport(data)
+    }
   }
 
   useEffect(()=>{ load() }, [])
@@ -34,7 +45,11 @@ export function Reports() {
               <tr><td className="pr-4 text-gray-600">Net</td><td className="font-semibold">{report.net.toFixed(2)}</td></tr>
             </tbody>
           </table>
-          <div className="mt-2 p-3 bg-gray-50 rounded">{report.narrative}</div>
+          <div className="mt-2 p-3 bg-gray-50 rounded">
+            {report.narrative_status === 'pending' && <span className="text-gray-500">Synthèse en cours de génération…</span>}
+            {report.narrative_status === 'failed' && <span className="text-red-700">{report.error}</span>}
+            {report.narrative}
+          </div>
         </div>
       )}
     </div>
@@ -1,5 +1,5 @@
 import { useEffect, useState } from 'react'
-import { api } from '@/lib/api'
+import { api, getPage } from '@/lib/api'
 import { SectionTitle } from '@/components/SectionTitle'
 
 interface Tx {
@@ -14,12 +14,20 @@ interface Tx {
 
 export function Transactions() {
   const [rows, setRows] = useState<Tx[]>([])
+  const [next, setNext] = useState<string | null>(null)
   const [form, setForm] = useState<Tx>({ date: new Date().toISOString().slice(0,10), amount: 0, direction: 'expense' })
   const [loading, setLoading] = useState(false)
 
   const load = async () => {
-    const { data } = await api.get<Tx[]>('/transactions')
-    setRows(data)
+    const page = await getPage<Tx>('/transactions')
+    setRows(page.rows)
+    setNext(page.next)
+  }
+
+  const loadMore = async () => {
+    const page = await getPage<Tx>('/transactions', next)
+    setRows(prev => [...prev, ...page.rows])
+    setNext(page.next)
   }
 
   useEffect(() => {
@@ -59,7 +67,7 @@ export function Transactions() {
       </form>
 
       <div className="flex justify-between items-center">
-        <div className="text-sm text-gray-600">{rows.length} transactions</div>
+        <div className="text-sm text-gray-600">{rows.length}{next ? '+' : ''} transactions</div>
         <button onClick={categorize} disabled={loading} className="bg-primary-50 hover:bg-primary-100 text-primary-700 border border-primary-200 rounded-md px-3 py-2">Catégoriser via AI</button>
       </div>
 
@@ -104,6 +112,11 @@ export function Transactions() {
           </tbody>
         </table>
       </div>
+      {next && (
+        <div className="flex justify-center">
+          <button onClick={loadMore} className="border rounded-md px-3 py-2 text-sm">Charger plus</button>
+        </div>
+      )}
     </div>
   )
 }
@@ -1,16 +1,18 @@
 import { useEffect, useState } from 'react'
-import { api } from '@/lib/api'
+import { api, getPage } from '@/lib/api'
 import { SectionTitle } from '@/components/SectionTitle'
 
 type User = { id:number; email:string; role:string; is_active:boolean }
 
 export function UsersAdmin() {
   const [rows, setRows] = useState<User[]>([])
+  const [next, setNext] = useState<string | null>(null)
   const [email, setEmail] = useState('')
   const [password, setPassword] = useState('')
   const [role, setRole] = useState<'user'|'admin'>('user')
 
-  const load = async ()=>{ const { data } = await api.get('/users'); setRows(data) }
+  const load = async ()=>{ const page = await getPage<User>('/users'); setRows(page.rows); setNext(page.next) }
+  const loadMore = async ()=>{ const page = await getPage<User>('/users', next); setRows(prev=>[...prev, ...page.rows]); setNext(page.next) }
   useEffect(()=>{ load() }, [])
 
   const add = async (e: React.FormEvent)=>{
@@ -62,6 +64,11 @@ export function UsersAdmin() {
           </tbody>
         </table>
       </div>
+      {next && (
+        <div className="flex justify-center">
+          <button onClick={loadMore} className="border rounded-md px-3 py-2 text-sm">Charger plus</button>
+        </div>
+      )}
     </div>
   )
 }
\ No newline at end of file